@@ -3,17 +3,21 @@ Router module for client-related endpoints.
 Handles all HTTP requests for client operations including create, read, update, and delete.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.auth.router import get_current_user, get_admin_user
 from app.models import User, UserRole
-from app.database import get_db
+from app.database import get_async_db
 from app.clients.service.client_service import ClientService
+from app.clients.service.pagination import encode_cursor, next_cursor
 from app.clients.schema import (
     ClientResponse,
     ClientUpdate,
     ClientListResponse,
+    ClientServiceResponse,
     ServiceResponse,
     ServiceUpdate,
 )
@@ -21,6 +25,94 @@ from app.clients.schema import (
 router = APIRouter(prefix="/clients", tags=["clients"])
 
 
+class RowsResponse(Response):
+    """
+    JSON response for client listings read as plain rows.
+
+    The rows come straight from typed columns, so they are serialized as-is
+    instead of being validated into ClientResponse models one by one first;
+    the route's response_model still documents the shape, and the tests
+    validate every listing body against it.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return to_json(content)
+
+
+def client_dicts(rows):
+    """Turn rows of client columns into dicts shaped like ClientResponse."""
+    if not rows:
+        return []
+    fields = rows[0]._fields
+    return [dict(zip(fields, row)) for row in rows]
+
+
+async def ndjson_lines(clients, limit=None):
+    """
+    Yield one JSON line per client row.
+
+    Headers are sent before the rows, so when a limited page is full the
+    next page's cursor follows as a last {"next_cursor": ...} line.
+    """
+    streamed, last_id = 0, None
+    async for client in clients:
+        streamed += 1
+        last_id = client.id
+        yield to_json(dict(zip(client._fields, client))) + b"\n"
+    if limit is not None and streamed == limit:
+        yield to_json({"next_cursor": encode_cursor(last_id)}) + b"\n"
+
+
+class SearchPage:
+    """Pagination and output format shared by the search endpoints."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(
+            default=None,
+            ge=1,
+            le=1000,
+            description="Maximum number of clients to return; all if omitted",
+        ),
+        cursor: Optional[str] = Query(
+            default=None,
+            description="X-Next-Cursor header, or next_cursor NDJSON line, "
+            "of the previous page",
+        ),
+        output_format: str = Query(
+            default="json",
+            alias="format",
+            pattern="^(json|ndjson)$",
+            description="json for a list, ndjson to stream one client per line",
+        ),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.stream = output_format == "ndjson"
+
+    def options(self):
+        return {"limit": self.limit, "cursor": self.cursor, "stream": self.stream}
+
+    def respond(self, clients):
+        """
+        Stream NDJSON results, ending with the next page's cursor line, or
+        return the list with the next page's cursor in the X-Next-Cursor
+        header.
+        """
+        if self.stream:
+            return StreamingResponse(
+                ndjson_lines(clients, self.limit), media_type="application/x-ndjson"
+            )
+        response = RowsResponse(client_dicts(clients))
+        if self.limit is not None:
+            cursor = next_cursor(clients, self.limit)
+            if cursor is not None:
+                response.headers["X-Next-Cursor"] = cursor
+        return response
+
+
 @router.get("/", response_model=ClientListResponse)
 async def get_clients(
     current_user: User = Depends(get_admin_user),
@@ -28,19 +120,26 @@ async def get_clients(
     limit: int = Query(
         default=50, ge=1, le=150, description="Maximum number of records to return"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor of the previous page"
+    ),
+    include_total: bool = Query(
+        default=True, description="Include the total number of clients"
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return ClientService.get_clients(db, skip, limit)
+    page = await ClientService.get_clients(db, skip, limit, cursor, include_total)
+    return RowsResponse({**page, "clients": client_dicts(page["clients"])})
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
 async def get_client(
     client_id: int,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get a specific client by ID"""
-    return ClientService.get_client(db, client_id)
+    return await ClientService.get_client(db, client_id)
 
 
 @router.get("/search/by-criteria", response_model=List[ClientResponse])
@@ -69,11 +168,12 @@ async def get_clients_by_criteria(
     substance_use: Optional[bool] = None,
     time_unemployed: Optional[int] = Query(None, ge=0),
     need_mental_health_support_bool: Optional[bool] = None,
+    page: SearchPage = Depends(),
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Search clients by any combination of criteria"""
-    return ClientService.get_clients_by_criteria(
+    clients = await ClientService.get_clients_by_criteria(
         db,
         employment_status=employment_status,
         education_level=education_level,
@@ -99,7 +199,9 @@ async def get_clients_by_criteria(
         substance_use=substance_use,
         time_unemployed=time_unemployed,
         need_mental_health_support_bool=need_mental_health_support_bool,
+        **page.options(),
     )
+    return page.respond(clients)
 
 
 @router.get("/search/by-services", response_model=List[ClientResponse])
@@ -111,11 +213,12 @@ async def get_clients_by_services(
     employment_related_financial_supports: Optional[bool] = None,
     employer_financial_supports: Optional[bool] = None,
     enhanced_referrals: Optional[bool] = None,
+    page: SearchPage = Depends(),
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get clients filtered by multiple service statuses"""
-    return ClientService.get_clients_by_services(
+    clients = await ClientService.get_clients_by_services(
         db,
         employment_assistance=employment_assistance,
         life_stabilization=life_stabilization,
@@ -124,17 +227,19 @@ async def get_clients_by_services(
         employment_related_financial_supports=employment_related_financial_supports,
         employer_financial_supports=employer_financial_supports,
         enhanced_referrals=enhanced_referrals,
+        **page.options(),
     )
+    return page.respond(clients)
 
 
-@router.get("/{client_id}/services", response_model=List[ServiceResponse])
+@router.get("/{client_id}/services", response_model=List[ClientServiceResponse])
 async def get_client_services(
     client_id: int,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all services and their status for a specific client, including case worker info"""
-    return ClientService.get_client_services(db, client_id)
+    return await ClientService.get_client_services(db, client_id)
 
 
 @router.get("/search/success-rate", response_model=List[ClientResponse])
@@ -142,20 +247,25 @@ async def get_clients_by_success_rate(
     min_rate: int = Query(
         70, ge=0, le=100, description="Minimum success rate percentage"
     ),
+    page: SearchPage = Depends(),
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get clients with success rate above specified threshold"""
-    return ClientService.get_clients_by_success_rate(db, min_rate)
+    clients = await ClientService.get_clients_by_success_rate(
+        db, min_rate, **page.options()
+    )
+    return page.respond(clients)
 
 
 @router.get("/case-worker/{case_worker_id}", response_model=List[ClientResponse])
 async def get_clients_by_case_worker(
     case_worker_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return ClientService.get_clients_by_case_worker(db, case_worker_id)
+    clients = await ClientService.get_clients_by_case_worker(db, case_worker_id)
+    return RowsResponse(client_dicts(clients))
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
@@ -163,10 +273,10 @@ async def update_client(
     client_id: int,
     client_data: ClientUpdate,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update a client's information"""
-    return ClientService.update_client(db, client_id, client_data)
+    return await ClientService.update_client(db, client_id, client_data)
 
 
 @router.put("/{client_id}/services/{user_id}", response_model=ServiceResponse)
@@ -175,9 +285,11 @@ async def update_client_services(
     user_id: int,
     service_update: ServiceUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return ClientService.update_client_services(db, client_id, user_id, service_update)
+    return await ClientService.update_client_services(
+        db, client_id, user_id, service_update
+    )
 
 
 @router.post("/{client_id}/case-assignment", response_model=ServiceResponse)
@@ -185,18 +297,18 @@ async def create_case_assignment(
     client_id: int,
     case_worker_id: int = Query(..., description="Case worker ID to assign"),
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new case assignment for a client with a case worker"""
-    return ClientService.create_case_assignment(db, client_id, case_worker_id)
+    return await ClientService.create_case_assignment(db, client_id, case_worker_id)
 
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_client(
     client_id: int,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a client"""
-    ClientService.delete_client(db, client_id)
+    await ClientService.delete_client(db, client_id)
     return None
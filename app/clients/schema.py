@@ -163,6 +163,21 @@ class ServiceResponse(BaseModel):
         from_attributes = True
 
 
+class CaseWorkerInfo(BaseModel):
+    id: int
+    username: str
+    email: str
+
+    class Config:
+        from_attributes = True
+
+
+class ClientServiceResponse(ServiceResponse):
+    """A client's services together with the case worker providing them."""
+
+    case_worker: CaseWorkerInfo = Field(validation_alias="user")
+
+
 class ServiceUpdate(BaseModel):
     employment_assistance: Optional[bool] = None
     life_stabilization: Optional[bool] = None
@@ -176,4 +191,5 @@ class ServiceUpdate(BaseModel):
 
 class ClientListResponse(BaseModel):
     clients: List[ClientResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -0,0 +1,115 @@
+"""
+Micro-batching module for the Common Assessment Tool.
+Coalesces concurrent prediction requests into a single stacked model call
+and routes each result back to the request that asked for it.
+"""
+
+import asyncio
+import os
+from collections import Counter
+
+PREDICTION_BATCH_WINDOW_MS = float(os.getenv("PREDICTION_BATCH_WINDOW_MS", "2"))
+PREDICTION_BATCH_MAX_SIZE = int(os.getenv("PREDICTION_BATCH_MAX_SIZE", "32"))
+
+
+class PredictionBatcher:
+    """
+    Collects predictions for up to ``window_ms`` milliseconds, or until
+    ``max_batch_size`` requests are waiting, then scores them together.
+
+    ``run_batch`` is an async callable taking a list of payloads and
+    returning one result per payload in the same order. A window of zero
+    disables coalescing and every payload is scored on its own.
+    """
+
+    def __init__(
+        self,
+        run_batch,
+        window_ms=PREDICTION_BATCH_WINDOW_MS,
+        max_batch_size=PREDICTION_BATCH_MAX_SIZE,
+    ):
+        self.run_batch = run_batch
+        self.window_ms = window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []
+        self._timer = None
+        self._batch_sizes = Counter()
+        # Batches being scored; the event loop only keeps weak references
+        self._tasks = set()
+
+    @property
+    def enabled(self):
+        """Whether requests are coalesced at all."""
+        return self.window_ms > 0 and self.max_batch_size > 1
+
+    async def submit(self, payload):
+        """
+        Queue a payload for the next batch and wait for its result.
+
+        Args:
+            payload: Input for a single prediction
+
+        Returns:
+            The result produced for this payload
+        """
+        if not self.enabled:
+            self._batch_sizes[1] += 1
+            results = await self.run_batch([payload])
+            return results[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand every waiting payload to a single batch run."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._batch_sizes[len(batch)] += 1
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        """Score a batch and resolve each waiting request's future."""
+        try:
+            results = await self.run_batch([payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def shutdown(self):
+        """Score the payloads still waiting and wait for running batches."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def stats(self):
+        """Return the batch-size distribution of coalesced predictions."""
+        batches = sum(self._batch_sizes.values())
+        requests = sum(size * count for size, count in self._batch_sizes.items())
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "pending": len(self._pending),
+            "batches": batches,
+            "requests": requests,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_sizes": {
+                str(size): count for size, count in sorted(self._batch_sizes.items())
+            },
+        }
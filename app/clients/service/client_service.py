@@ -3,19 +3,120 @@ Client service module handling all database operations for clients.
 Provides CRUD operations and business logic for client management.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import os
+import threading
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, object_session
+from sqlalchemy import and_, delete, event, func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
 from app.models import Client, ClientCase, User
 from app.clients.schema import ClientUpdate, ServiceUpdate, ServiceResponse
+from app.clients.service.pagination import decode_cursor, next_cursor
+
+CLIENT_COUNT_TTL_SECONDS = float(os.getenv("CLIENT_COUNT_TTL_SECONDS", "60"))
+# Rows fetched per round trip when streaming search results
+SEARCH_STREAM_BATCH_SIZE = int(os.getenv("SEARCH_STREAM_BATCH_SIZE", "1000"))
+# List endpoints select these columns as plain rows instead of Client
+# objects, skipping the identity map and change tracking they never use
+CLIENT_COLUMNS = tuple(Client.__table__.columns)
+CASE_COLUMNS = tuple(ClientCase.__table__.columns)
+
+# INSERT constructs supporting ON CONFLICT, by database backend
+DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class ClientCounter:
+    """
+    Cached total number of clients.
+
+    Committed ORM inserts and deletes in this process adjust the cached
+    value, and it is recounted after ``ttl_seconds`` to pick up writes from
+    other processes and bulk loads that bypass the ORM.
+    """
+
+    def __init__(self, ttl_seconds=CLIENT_COUNT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._total = None
+        self._expires_at = 0.0
+
+    async def get(self, db: AsyncSession):
+        """Return the cached total, counting the clients when it expired"""
+        with self._lock:
+            if self._total is not None and time.monotonic() < self._expires_at:
+                return self._total
+        # pylint: disable-next=not-callable
+        total = await db.scalar(select(func.count(Client.id)))
+        with self._lock:
+            self._total = total
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        return total
+
+    def adjust(self, delta):
+        """Apply committed inserts (positive) or deletes (negative)"""
+        with self._lock:
+            if self._total is not None:
+                self._total += delta
+
+    def invalidate(self):
+        """Forget the cached total so the next read recounts"""
+        with self._lock:
+            self._total = None
+
+
+client_counter = ClientCounter()
+
+
+def dialect_insert(db, table):
+    """
+    Return the backend's own INSERT construct for a table or model.
+
+    Backends missing from DIALECT_INSERTS get the generic INSERT, which
+    has no ON CONFLICT clause.
+    """
+    return DIALECT_INSERTS.get(db.bind.dialect.name, insert)(table)
+
+
+def supports_on_conflict(db):
+    """Check whether dialect_insert supports ON CONFLICT for this backend."""
+    return db.bind.dialect.name in DIALECT_INSERTS
+
+
+def _track_client_count(delta):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info["client_count_delta"] = (
+                session.info.get("client_count_delta", 0) + delta
+            )
+
+    return listener
+
+
+event.listen(Client, "after_insert", _track_client_count(1))
+event.listen(Client, "after_delete", _track_client_count(-1))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_client_count(session):
+    delta = session.info.pop("client_count_delta", 0)
+    if delta:
+        client_counter.adjust(delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_client_count(session):
+    session.info.pop("client_count_delta", None)
 
 
 class ClientService:
     @staticmethod
-    def get_client(db: Session, client_id: int):
+    async def get_client(db: AsyncSession, client_id: int):
         """Get a specific client by ID"""
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = await db.get(Client, client_id)
         if not client:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -24,10 +125,21 @@ class ClientService:
         return client
 
     @staticmethod
-    def get_clients(db: Session, skip: int = 0, limit: int = 50):
+    async def get_clients(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+    ):
         """
         Get clients with optional pagination.
         Default shows first 50 clients, which means you'd need 3 pages for 150 records.
+
+        Passing the next_cursor of a page seeks straight past its last id,
+        so deep pages cost the same as the first; skip keeps working for
+        existing callers. The total comes from a cached counter and can be
+        left out entirely.
         """
         if skip < 0:
             raise HTTPException(
@@ -39,20 +151,62 @@ class ClientService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Limit must be greater than 0",
             )
+        if cursor is not None and skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either skip or cursor, not both",
+            )
 
-        clients = db.query(Client).offset(skip).limit(limit).all()
-        total = db.query(Client).count()
-        return {"clients": clients, "total": total}
+        query = select(*CLIENT_COLUMNS).order_by(Client.id)
+        if cursor is not None:
+            query = query.where(Client.id > decode_cursor(cursor))
+        else:
+            query = query.offset(skip)
+        clients = (await db.execute(query.limit(limit))).all()
+        total = await client_counter.get(db) if include_total else None
+        return {
+            "clients": clients,
+            "total": total,
+            "next_cursor": next_cursor(clients, limit),
+        }
 
     @staticmethod
     def __update_query_by_filter(query, elements):
         for element, value in elements.items():
             if value is not None and element != "age":
-                query = query.filter(getattr(Client, element) == value)
+                query = query.where(getattr(Client, element) == value)
             elif value is not None and element == "age":
-                query = query.filter(getattr(Client, "age") >= value)
+                query = query.where(getattr(Client, "age") >= value)
         return query
 
+    @staticmethod
+    async def __search_results(db, query, limit=None, cursor=None, stream=False):
+        """
+        Order search results by id and apply cursor pagination.
+
+        Case filters are applied as ``id IN (subquery)`` rather than a join,
+        so every client appears once and id order can page through them.
+        Results are read-only rows of CLIENT_COLUMNS. Streaming returns an
+        async iterator fetching SEARCH_STREAM_BATCH_SIZE rows at a time
+        instead of loading every match into memory.
+        """
+        query = query.order_by(Client.id)
+        if cursor is not None:
+            query = query.where(Client.id > decode_cursor(cursor))
+        if limit is not None:
+            query = query.limit(limit)
+        if stream:
+            return await db.stream(
+                query.execution_options(yield_per=SEARCH_STREAM_BATCH_SIZE)
+            )
+        try:
+            return (await db.execute(query)).all()
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error retrieving clients: {str(e)}",
+            )
+
     @staticmethod
     def __education_level_validation(education_level):
         if education_level is not None and not (1 <= education_level <= 14):
@@ -77,8 +231,8 @@ class ClientService:
             )
 
     @staticmethod
-    def get_clients_by_criteria(
-        db: Session,
+    async def get_clients_by_criteria(
+        db: AsyncSession,
         employment_status: Optional[bool] = None,
         education_level: Optional[int] = None,
         age_min: Optional[int] = None,
@@ -103,9 +257,12 @@ class ClientService:
         substance_use: Optional[bool] = None,
         time_unemployed: Optional[int] = None,
         need_mental_health_support_bool: Optional[bool] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        stream: bool = False,
     ):
         """Get clients filtered by any combination of criteria"""
-        query = db.query(Client)
+        query = select(*CLIENT_COLUMNS)
 
         ClientService.__education_level_validation(education_level)
         ClientService.__age_validation(age_min)
@@ -139,40 +296,43 @@ class ClientService:
         }
 
         query = ClientService.__update_query_by_filter(query, elements)
-        try:
-            return query.all()
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error retrieving clients: {str(e)}",
-            )
+        return await ClientService.__search_results(db, query, limit, cursor, stream)
 
     @staticmethod
-    def get_clients_by_services(db: Session, **service_filters: Optional[bool]):
+    async def get_clients_by_services(
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        stream: bool = False,
+        **service_filters: Optional[bool],
+    ):
         """
         Get clients filtered by multiple service statuses.
         """
-        query = db.query(Client).join(ClientCase)
-
+        cases = select(ClientCase.client_id)
         for service_name, status in service_filters.items():
             if status is not None:
                 filter_criteria = getattr(ClientCase, service_name) == status
-                query = query.filter(filter_criteria)
+                cases = cases.where(filter_criteria)
 
-        try:
-            return query.all()
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error retrieving clients: {str(e)}",
-            )
+        query = select(*CLIENT_COLUMNS).where(Client.id.in_(cases))
+        return await ClientService.__search_results(db, query, limit, cursor, stream)
 
     @staticmethod
-    def get_client_services(db: Session, client_id: int):
-        """Get all services for a specific client with case worker info"""
-        client_cases = (
-            db.query(ClientCase).filter(ClientCase.client_id == client_id).all()
+    async def get_client_services(db: AsyncSession, client_id: int):
+        """
+        Get all services for a specific client with case worker info.
+
+        Case workers are joined into the same query, since AsyncSession
+        cannot lazy load them while the response is serialized.
+        """
+        query = (
+            select(ClientCase)
+            .where(ClientCase.client_id == client_id)
+            .options(joinedload(ClientCase.user))
+            .order_by(ClientCase.user_id)
         )
+        client_cases = (await db.scalars(query)).all()
         if not client_cases:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -181,7 +341,13 @@ class ClientService:
         return client_cases
 
     @staticmethod
-    def get_clients_by_success_rate(db: Session, min_rate: int = 70):
+    async def get_clients_by_success_rate(
+        db: AsyncSession,
+        min_rate: int = 70,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        stream: bool = False,
+    ):
         """Get clients with success rate at or above the specified percentage"""
         if not (0 <= min_rate <= 100):
             raise HTTPException(
@@ -189,153 +355,169 @@ class ClientService:
                 detail="Success rate must be between 0 and 100",
             )
 
-        return (
-            db.query(Client)
-            .join(ClientCase)
-            .filter(ClientCase.success_rate >= min_rate)
-            .all()
-        )
+        cases = select(ClientCase.client_id).where(ClientCase.success_rate >= min_rate)
+        query = select(*CLIENT_COLUMNS).where(Client.id.in_(cases))
+        return await ClientService.__search_results(db, query, limit, cursor, stream)
 
     @staticmethod
-    def get_clients_by_case_worker(db: Session, case_worker_id: int):
+    async def get_clients_by_case_worker(db: AsyncSession, case_worker_id: int):
         """Get all clients assigned to a specific case worker"""
-        case_worker = db.query(User).filter(User.id == case_worker_id).first()
+        case_worker = await db.get(User, case_worker_id)
         if not case_worker:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Case worker with id {case_worker_id} not found",
             )
 
-        return (
-            db.query(Client)
-            .join(ClientCase)
-            .filter(ClientCase.user_id == case_worker_id)
-            .all()
-        )
+        cases = select(ClientCase.client_id).where(ClientCase.user_id == case_worker_id)
+        query = select(*CLIENT_COLUMNS).where(Client.id.in_(cases))
+        return (await db.execute(query)).all()
 
     @staticmethod
-    def update_client(db: Session, client_id: int, client_update: ClientUpdate):
-        """Update a client's information"""
-        client = db.query(Client).filter(Client.id == client_id).first()
-        if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Client with id {client_id} not found",
-            )
+    async def update_client(
+        db: AsyncSession, client_id: int, client_update: ClientUpdate
+    ):
+        """
+        Update a client's information.
 
+        The update returns the new row in the same statement, so a write
+        is one round trip; no returned row means the client does not exist.
+        """
         update_data = client_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(client, field, value)
-
+        if not update_data:
+            return await ClientService.get_client(db, client_id)
+
+        query = (
+            update(Client)
+            .where(Client.id == client_id)
+            .values(**update_data)
+            .returning(*CLIENT_COLUMNS)
+        )
         try:
-            db.commit()
-            db.refresh(client)
-            return client
+            client = (await db.execute(query)).first()
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to update client: {str(e)}",
             )
 
-    @staticmethod
-    def update_client_services(
-        db: Session, client_id: int, user_id: int, service_update: ServiceUpdate
-    ):
-        """Update a client's services and outcomes for a specific case worker"""
-        client_case = (
-            db.query(ClientCase)
-            .filter(ClientCase.client_id == client_id, ClientCase.user_id == user_id)
-            .first()
-        )
-
-        if not client_case:
+        if client is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No case found for client {client_id} with case worker {user_id}. "
-                f"Cannot update services for a non-existent case assignment.",
+                detail=f"Client with id {client_id} not found",
             )
+        return client
 
+    @staticmethod
+    async def update_client_services(
+        db: AsyncSession, client_id: int, user_id: int, service_update: ServiceUpdate
+    ):
+        """Update a client's services and outcomes for a specific case worker"""
+        not_found = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No case found for client {client_id} with case worker {user_id}. "
+            f"Cannot update services for a non-existent case assignment.",
+        )
         update_data = service_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(client_case, field, value)
+        if not update_data:
+            client_case = await db.get(ClientCase, (client_id, user_id))
+            if not client_case:
+                raise not_found
+            return client_case
 
+        query = (
+            update(ClientCase)
+            .where(ClientCase.client_id == client_id, ClientCase.user_id == user_id)
+            .values(**update_data)
+            .returning(*CASE_COLUMNS)
+        )
         try:
-            db.commit()
-            db.refresh(client_case)
-            return client_case
+            client_case = (await db.execute(query)).first()
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to update client services: {str(e)}",
             )
 
-    @staticmethod
-    def create_case_assignment(db: Session, client_id: int, case_worker_id: int):
-        """Create a new case assignment"""
-        # Check if client exists
-        client = db.query(Client).filter(Client.id == client_id).first()
-        if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Client with id {client_id} not found",
-            )
-
-        # Check if case worker exists
-        case_worker = db.query(User).filter(User.id == case_worker_id).first()
-        if not case_worker:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Case worker with id {case_worker_id} not found",
-            )
+        if client_case is None:
+            raise not_found
+        return client_case
 
-        # Check if assignment already exists
-        existing_case = (
-            db.query(ClientCase)
-            .filter(
-                ClientCase.client_id == client_id, ClientCase.user_id == case_worker_id
-            )
-            .first()
+    @staticmethod
+    async def create_case_assignment(
+        db: AsyncSession, client_id: int, case_worker_id: int
+    ):
+        """
+        Create a new case assignment.
+
+        A single INSERT ... SELECT only produces a row when both the client
+        and the case worker exist, and ON CONFLICT DO NOTHING skips an
+        assignment that already exists, so the new case comes back from
+        RETURNING in one round trip. Only when nothing was inserted is the
+        database asked which of the three cases it was. Backends without
+        ON CONFLICT check for an existing assignment before the INSERT.
+        """
+        # New case assignments start with default service values
+        values = select(
+            Client.id,
+            User.id,
+            literal(False),  # employment_assistance
+            literal(False),  # life_stabilization
+            literal(False),  # retention_services
+            literal(False),  # specialized_services
+            literal(False),  # employment_related_financial_supports
+            literal(False),  # employer_financial_supports
+            literal(False),  # enhanced_referrals
+            literal(0),  # success_rate
+        ).join_from(Client, User, User.id == case_worker_id)
+        query = dialect_insert(db, ClientCase).from_select(
+            [column.name for column in CASE_COLUMNS],
+            values.where(Client.id == client_id),
         )
-
-        if existing_case:
+        if supports_on_conflict(db):
+            query = query.on_conflict_do_nothing()
+        elif await db.get(ClientCase, (client_id, case_worker_id)) is not None:
+            # Other backends look for an existing assignment up front
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Client {client_id} already has a case assigned to case worker {case_worker_id}",
             )
-
         try:
-            # Create new case assignment with default service values
-            new_case = ClientCase(
-                client_id=client_id,
-                user_id=case_worker_id,
-                employment_assistance=False,
-                life_stabilization=False,
-                retention_services=False,
-                specialized_services=False,
-                employment_related_financial_supports=False,
-                employer_financial_supports=False,
-                enhanced_referrals=False,
-                success_rate=0,
-            )
-            db.add(new_case)
-            db.commit()
-            db.refresh(new_case)
-            return new_case
-
+            new_case = (await db.execute(query.returning(*CASE_COLUMNS))).first()
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to create case assignment: {str(e)}",
             )
 
+        if new_case is not None:
+            return new_case
+        if await db.get(Client, client_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Client with id {client_id} not found",
+            )
+        if await db.get(User, case_worker_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Case worker with id {case_worker_id} not found",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Client {client_id} already has a case assigned to case worker {case_worker_id}",
+        )
+
     @staticmethod
-    def delete_client(db: Session, client_id: int):
+    async def delete_client(db: AsyncSession, client_id: int):
         """Delete a client and their associated records"""
         # First check if client exists
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = await db.get(Client, client_id)
         if not client:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -344,14 +526,16 @@ class ClientService:
 
         try:
             # Delete associated client_cases
-            db.query(ClientCase).filter(ClientCase.client_id == client_id).delete()
+            await db.execute(
+                delete(ClientCase).where(ClientCase.client_id == client_id)
+            )
 
             # Delete the client
-            db.delete(client)
-            db.commit()
+            await db.delete(client)
+            await db.commit()
 
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to delete client: {str(e)}",
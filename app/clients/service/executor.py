@@ -0,0 +1,128 @@
+"""
+Inference executor module for the Common Assessment Tool.
+Runs CPU-bound model predictions on a dedicated thread or process pool so
+the asyncio event loop keeps serving other requests while they run.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "32"))
+
+
+class InferenceQueueFull(Exception):
+    """Raised when a prediction is submitted while the queue is at capacity."""
+
+
+class InferenceExecutor:
+    """
+    Bounded executor for model inference.
+
+    At most ``workers`` predictions run at once and at most ``queue_size``
+    more wait for a free worker; anything beyond that is rejected right away
+    instead of piling up behind a slow model.
+    """
+
+    def __init__(
+        self,
+        kind=INFERENCE_EXECUTOR,
+        workers=INFERENCE_WORKERS,
+        queue_size=INFERENCE_QUEUE_SIZE,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError("Inference executor must be 'thread' or 'process'")
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = None
+        self._in_flight = 0
+        # Deepest queue seen and predictions completed, failed or rejected
+        self._stats = {
+            "max_queue_depth": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+        }
+        # Pool threads update the counters when predictions finish
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        """Create the worker pool on first use."""
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="inference"
+                )
+        return self._pool
+
+    def queue_depth(self):
+        """Number of submitted predictions waiting for a free worker."""
+        return max(0, self._in_flight - self.workers)
+
+    async def run(self, func, *args):
+        """
+        Run a function on the inference pool and await its result.
+
+        Args:
+            func: Callable to run, must be picklable for the process pool
+            *args: Positional arguments passed to the callable
+
+        Returns:
+            The value returned by the callable
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_size:
+                self._stats["rejected"] += 1
+                raise InferenceQueueFull(
+                    f"Prediction queue is full ({self.queue_size} waiting)"
+                )
+            self._in_flight += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self.queue_depth()
+            )
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BaseException:
+            self._finished(None)
+            raise
+        # The slot is released when the work ends, not when the caller stops
+        # waiting: a cancelled request leaves a started prediction running
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future):
+        """Release a prediction's slot and count how it ended."""
+        with self._lock:
+            self._in_flight -= 1
+            if future is None or future.cancelled():
+                return
+            if future.exception() is None:
+                self._stats["completed"] += 1
+            else:
+                self._stats["failed"] += 1
+
+    def stats(self):
+        """Return queue-depth and throughput counters for the executor."""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth(),
+            **self._stats,
+        }
+
+    def shutdown(self):
+        """Stop the worker pool, waiting for running predictions to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+inference_executor = InferenceExecutor()
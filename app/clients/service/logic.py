@@ -6,14 +6,25 @@ Handles data cleaning, model predictions, and intervention combinations analysis
 # Standard library imports
 import os
 import json
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
 from itertools import product
 from app.utils import TextConverter
 
 # Third-party imports
-import pickle
 import numpy as np
 
+from app.clients.service.executor import inference_executor
+from app.clients.service.intervention_search import (
+    BEAM_WIDTH,
+    beam_search,
+    combination_predictor,
+)
 from app.clients.service.model_path import ModelPath
+from app.clients.service.model_registry import registry
+from app.clients.service.tree_engine import FlatForest
 
 # Constants
 COLUMN_INTERVENTIONS = [
@@ -25,48 +36,145 @@ COLUMN_INTERVENTIONS = [
     "Employer Financial Supports",
     "Enhanced Referrals for Skills Development",
 ]
-CURRENT_MODEL = "forest regression"
+# All 128 combinations of the interventions, built once and shared read-only.
+# The first combination has no interventions, so it doubles as the baseline.
+INTERVENTION_MATRIX = np.array(
+    list(product([0, 1], repeat=len(COLUMN_INTERVENTIONS))), dtype=float
+)
+INTERVENTION_MATRIX.setflags(write=False)
+ROWS_PER_CLIENT = len(INTERVENTION_MATRIX)
+INTERVENTION_COUNTS = INTERVENTION_MATRIX.sum(axis=1)
+MAX_BATCH_SIZE = int(os.getenv("PREDICTION_MAX_BATCH_SIZE", "1000"))
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "1024"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+# "predict" scores all 129 rows with the model, "partial" walks each tree once
+# on the client's fixed features and reads the 128 combinations off a table
+PREDICTION_STRATEGIES = ("predict", "partial")
+PREDICTION_STRATEGY = os.getenv("PREDICTION_STRATEGY", "partial")
+
+
+class PredictionCache:
+    """
+    Size-bounded LRU cache of prediction results with a per-entry time to live.
+
+    Entries are keyed on the active model name and the cleaned feature
+    vector, so identical assessments skip the 129 model predictions.
+    """
 
-# Load model
-# CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-# MODEL_PATH = os.path.join(CURRENT_DIR, FOREST_REGRSSION)
-# with open(MODEL_PATH, "rb") as model_file:
-#     MODEL = pickle.load(model_file)
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = (
+            PREDICTION_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(model_name, raw_data):
+        """Build a hashable key from the model name and cleaned features."""
+        return (model_name, tuple(float(value) for value in raw_data))
+
+    def get(self, key):
+        """Return the cached result for a key, or None when absent or expired."""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entry when full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return size and hit ratio counters for the cache."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
+
+
+prediction_cache = PredictionCache()
 
 
 def load_model(model):
     """
-    Load the machine learning model from the specified path.
+    Make the specified model the active one for predictions.
+    The model is only read from disk the first time it is requested,
+    and cached predictions of the previous model are discarded.
     """
-    global CURRENT_MODEL
-    model_name = model.lower()
-    model_type = ""
-    if model_name == "forest regression":
-        model_type = ModelPath.FOREST_REGRSSION
-    elif model_name == "extra trees regression":
-        model_type = ModelPath.EXTRA_TREES_REGRESSOR
-    elif model_name == "ada boost regression":
-        model_type = ModelPath.ADA_BOOST_REGRESSOR
+    active_model = registry.activate(model)
+    prediction_cache.clear()
+    return active_model
 
-    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-    MODEL_PATH = os.path.join(CURRENT_DIR, model_type.value)
-    CURRENT_MODEL = model_name
 
-    try:
-        with open(MODEL_PATH, "rb") as model_file:
-            model = pickle.load(model_file)
-        return model
-    except FileNotFoundError:
-        raise RuntimeError(f"Model file not found at {MODEL_PATH}.")
-    except Exception:
-        raise Exception("The model was not able to be loaded.")
+# Model pinned by run_with_model for the prediction running on this thread
+_pinned_model = threading.local()
+
+
+def prediction_model():
+    """
+    Return the (name, model) pair predictions on this thread should use.
+
+    This is the model pinned by run_with_model, or the active model when
+    a prediction is made outside the inference executor.
+    """
+    pinned = getattr(_pinned_model, "value", None)
+    return pinned if pinned is not None else registry.active()
+
+
+def ensure_model_loaded():
+    """
+    Load the active model if it is not resident yet.
+
+    Raises:
+        RuntimeError: If the active model has no artifact on disk
+    """
+    registry.active()
 
 
 def get_current_model():
     """
     Method to get the current model in use
     """
-    return CURRENT_MODEL
+    return registry.active_name()
+
+
+def get_model_stats():
+    """
+    Method to get the model registry, prediction cache and executor counters
+    """
+    return {
+        "registry": registry.stats(),
+        "cache": prediction_cache.stats(),
+        "executor": inference_executor.stats(),
+    }
 
 
 def list_all_models():
@@ -124,19 +232,52 @@ def clean_input_data(input_data):
     return output
 
 
-def create_matrix(row_data):
+_buffers = threading.local()
+
+
+def combination_buffer(num_features=24):
+    """
+    Return this thread's reusable combination matrix.
+
+    The intervention columns are filled in once when the buffer is created,
+    so each prediction only has to write the client's row into it.
+
+    Args:
+        num_features (int): Number of client features before the interventions
+
+    Returns:
+        np.array: Preallocated (128, num_features + 7) matrix
+    """
+    buffer = getattr(_buffers, "matrix", None)
+    if buffer is None or buffer.shape[1] != num_features + len(COLUMN_INTERVENTIONS):
+        buffer = np.empty(
+            (ROWS_PER_CLIENT, num_features + len(COLUMN_INTERVENTIONS)), dtype=float
+        )
+        buffer[:, num_features:] = INTERVENTION_MATRIX
+        _buffers.matrix = buffer
+    return buffer
+
+
+def create_matrix(row_data, out=None):
     """
     Create matrix of all possible intervention combinations.
 
     Args:
         row_data (list): Base data row
+        out (np.array): Optional matrix from combination_buffer to fill in
+            place instead of allocating a new one
 
     Returns:
         np.array: Matrix of all possible intervention combinations
     """
-    data = [row_data.copy() for _ in range(128)]
-    perms = intervention_permutations(7)
-    return np.concatenate((np.array(data), np.array(perms)), axis=1)
+    num_features = len(row_data)
+    if out is None:
+        out = np.empty(
+            (ROWS_PER_CLIENT, num_features + len(COLUMN_INTERVENTIONS)), dtype=float
+        )
+        out[:, num_features:] = INTERVENTION_MATRIX
+    out[:, :num_features] = row_data
+    return out
 
 
 def intervention_permutations(num):
@@ -149,6 +290,8 @@ def intervention_permutations(num):
     Returns:
         np.array: Matrix of all possible combinations
     """
+    if num == len(COLUMN_INTERVENTIONS):
+        return INTERVENTION_MATRIX
     return np.array(list(product([0, 1], repeat=num)))
 
 
@@ -196,32 +339,332 @@ def process_results(baseline_pred, results_matrix):
     return {"baseline": baseline_pred[-1], "interventions": result_list}
 
 
-def interpret_and_calculate(input_data):
+def intervention_indices(names):
+    """
+    Map intervention names onto their columns in INTERVENTION_MATRIX.
+
+    Args:
+        names (list): Intervention names from COLUMN_INTERVENTIONS
+
+    Returns:
+        list: Column index of every name
+    """
+    lookup = {name.lower(): index for index, name in enumerate(COLUMN_INTERVENTIONS)}
+    try:
+        return [lookup[name.lower()] for name in names]
+    except KeyError as e:
+        raise ValueError(f"Unknown intervention: {e.args[0]}")
+
+
+def build_intervention_mask(max_interventions=None, required=(), excluded=()):
+    """
+    Select the intervention combinations allowed by a set of constraints.
+
+    Args:
+        max_interventions (int): Largest number of interventions in a plan
+        required (list): Interventions every plan must include
+        excluded (list): Interventions no plan may include
+
+    Returns:
+        np.array: Boolean mask over the rows of INTERVENTION_MATRIX
+    """
+    required_columns = intervention_indices(required)
+    excluded_columns = intervention_indices(excluded)
+    if set(required_columns) & set(excluded_columns):
+        raise ValueError("An intervention cannot be both required and excluded")
+
+    mask = np.ones(ROWS_PER_CLIENT, dtype=bool)
+    if max_interventions is not None:
+        mask &= INTERVENTION_COUNTS <= max_interventions
+    if required_columns:
+        mask &= INTERVENTION_MATRIX[:, required_columns].all(axis=1)
+    if excluded_columns:
+        mask &= ~INTERVENTION_MATRIX[:, excluded_columns].any(axis=1)
+    return mask
+
+
+def select_top_interventions(
+    predictions, top_k=3, max_interventions=None, required=(), excluded=()
+):
+    """
+    Pick the best intervention combinations that satisfy the constraints.
+
+    Only the allowed combinations are considered, and the best top_k are
+    found with argpartition rather than sorting every prediction. Ties are
+    broken in favour of the combination listed first.
+
+    Args:
+        predictions (np.array): Prediction for each row of INTERVENTION_MATRIX
+        top_k (int): Number of combinations to return
+        max_interventions (int): Largest number of interventions in a plan
+        required (list): Interventions every plan must include
+        excluded (list): Interventions no plan may include
+
+    Returns:
+        dict: Processed results with baseline and interventions, best last
+    """
+    candidates = np.flatnonzero(
+        build_intervention_mask(max_interventions, required, excluded)
+    )
+    scores = predictions[candidates]
+    top_k = min(top_k, len(candidates))
+    if top_k > 0:
+        kth = len(scores) - top_k
+        cutoff = np.partition(scores, kth)[kth]
+        above = np.flatnonzero(scores > cutoff)
+        ties = np.flatnonzero(scores == cutoff)[: top_k - len(above)]
+        top = np.sort(np.concatenate((above, ties)))
+        top = top[np.argsort(scores[top], kind="stable")]
+    else:
+        top = np.array([], dtype=int)
+
+    rows = candidates[top]
+    results_matrix = np.column_stack((INTERVENTION_MATRIX[rows], predictions[rows]))
+    # The first combination has no interventions, which is the baseline row
+    return process_results(predictions[:1], results_matrix)
+
+
+def uses_partial_evaluation(model, strategy=None):
+    """
+    Check whether a prediction should use partial evaluation.
+
+    Args:
+        model: Active model
+        strategy (str): One of PREDICTION_STRATEGIES, defaults to
+            PREDICTION_STRATEGY
+
+    Returns:
+        bool: True when the strategy is "partial" and the model supports it
+    """
+    strategy = strategy or PREDICTION_STRATEGY
+    if strategy not in PREDICTION_STRATEGIES:
+        raise ValueError(
+            f"Prediction strategy must be one of {', '.join(PREDICTION_STRATEGIES)}"
+        )
+    return strategy == "partial" and isinstance(model, FlatForest)
+
+
+def predict_interventions(model, raw_data, strategy=None):
+    """
+    Predict every intervention combination for one client.
+
+    Args:
+        model: Model used for the predictions
+        raw_data (list): Cleaned client data
+        strategy (str): One of PREDICTION_STRATEGIES
+
+    Returns:
+        np.array: Prediction for each row of INTERVENTION_MATRIX, the first
+            of which is the baseline
+    """
+    if uses_partial_evaluation(model, strategy):
+        return model.predict_combinations(raw_data, INTERVENTION_MATRIX)
+    return model.predict(create_matrix(raw_data, out=combination_buffer()))
+
+
+def cache_predictions(cache_key, predictions):
+    """Store a client's predictions read-only so cached copies stay intact."""
+    predictions.setflags(write=False)
+    prediction_cache.put(cache_key, predictions)
+    return predictions
+
+
+def score_client(raw_data, strategy=None):
+    """
+    Predict every intervention combination for one client, using the cache.
+
+    Args:
+        raw_data (list): Cleaned client data
+        strategy (str): One of PREDICTION_STRATEGIES
+
+    Returns:
+        np.array: Prediction for each row of INTERVENTION_MATRIX
+    """
+    model_name, model = prediction_model()
+    cache_key = PredictionCache.make_key(model_name, raw_data)
+    cached = prediction_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return cache_predictions(
+        cache_key, predict_interventions(model, raw_data, strategy)
+    )
+
+
+def score_clients(inputs, strategy=None):
+    """
+    Predict every intervention combination for many clients.
+
+    The 128 combinations of every client, the first of which is the baseline,
+    are written into a single (N * 128, 31) matrix so the model is only
+    invoked once. With partial evaluation all clients are instead resolved
+    together in one shared tree walk. Inputs already in the prediction cache
+    are not rescored.
+
+    Args:
+        inputs (list): Raw input data dicts, one per client
+        strategy (str): One of PREDICTION_STRATEGIES, defaults to
+            PREDICTION_STRATEGY
+
+    Returns:
+        list: Predictions per input, or a dict with an "error" message for
+            inputs that could not be converted into model features
+    """
+    model_name, model = prediction_model()
+    partial = uses_partial_evaluation(model, strategy)
+    results = [None] * len(inputs)
+    positions = []
+    cache_keys = []
+    rows = []
+    for index, input_data in enumerate(inputs):
+        try:
+            raw_data = np.asarray(clean_input_data(input_data), dtype=float)
+        except KeyError as e:
+            results[index] = {"error": f"Missing field: {e}"}
+            continue
+        except (TypeError, ValueError) as e:
+            results[index] = {"error": f"Invalid value: {e}"}
+            continue
+        cache_key = PredictionCache.make_key(model_name, raw_data)
+        results[index] = prediction_cache.get(cache_key)
+        if results[index] is not None:
+            continue
+        positions.append(index)
+        cache_keys.append(cache_key)
+        rows.append(raw_data)
+
+    if not rows:
+        return results
+
+    rows = np.stack(rows)
+    if partial:
+        predictions = model.predict_combinations(rows, INTERVENTION_MATRIX)
+    else:
+        num_features = rows.shape[1]
+        features = np.empty(
+            (len(rows), ROWS_PER_CLIENT, num_features + len(COLUMN_INTERVENTIONS))
+        )
+        features[:, :, :num_features] = rows[:, np.newaxis, :]
+        features[:, :, num_features:] = INTERVENTION_MATRIX
+        predictions = model.predict(features.reshape(-1, features.shape[2])).reshape(
+            len(rows), ROWS_PER_CLIENT
+        )
+    for index, cache_key, client_predictions in zip(positions, cache_keys, predictions):
+        results[index] = cache_predictions(cache_key, client_predictions.copy())
+    return results
+
+
+def interpret_and_calculate(input_data, strategy=None, **constraints):
     """
     Main function to process input data and generate intervention recommendations.
 
     Args:
         input_data (dict): Raw input data from client
+        strategy (str): One of PREDICTION_STRATEGIES, defaults to
+            PREDICTION_STRATEGY
+        **constraints: top_k, max_interventions, required and excluded, as
+            accepted by select_top_interventions
 
     Returns:
         dict: Processed results with recommendations
     """
-    global CURRENT_MODEL
     raw_data = clean_input_data(input_data)
-    baseline_row = get_baseline_row(raw_data).reshape(1, -1)
-    intervention_rows = create_matrix(raw_data)
-    model = load_model(CURRENT_MODEL)
-    print("Currently using model: ", end="")
-    print(CURRENT_MODEL)
-    baseline_prediction = model.predict(baseline_row)
-    intervention_predictions = model.predict(intervention_rows).reshape(-1, 1)
-    result_matrix = np.concatenate(
-        (intervention_rows, intervention_predictions), axis=1
+    return select_top_interventions(score_client(raw_data, strategy), **constraints)
+
+
+def interpret_and_calculate_batch(inputs, strategy=None, **constraints):
+    """
+    Generate intervention recommendations for many clients with one predict call.
+
+    Args:
+        inputs (list): Raw input data dicts, one per client
+        strategy (str): One of PREDICTION_STRATEGIES, defaults to
+            PREDICTION_STRATEGY
+        **constraints: top_k, max_interventions, required and excluded, as
+            accepted by select_top_interventions
+
+    Returns:
+        list: Processed results per input, or a dict with an "error" message
+            for inputs that could not be converted into model features
+    """
+    return [
+        result
+        if isinstance(result, dict)
+        else select_top_interventions(result, **constraints)
+        for result in score_clients(inputs, strategy)
+    ]
+
+
+def search_interventions(
+    input_data,
+    beam_width=BEAM_WIDTH,
+    top_k=3,
+    max_interventions=None,
+    required=(),
+    excluded=(),
+):
+    """
+    Generate intervention recommendations with beam search.
+
+    Unlike interpret_and_calculate this does not score all 2^n combinations,
+    so it stays affordable as interventions are added.
+
+    Args:
+        input_data (dict): Raw input data from client
+        beam_width (int): Plans kept at each plan size
+        top_k (int): Number of plans to return
+        max_interventions (int): Largest number of interventions in a plan
+        required (list): Interventions every plan must include
+        excluded (list): Interventions no plan may include
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    raw_data = np.asarray(clean_input_data(input_data), dtype=float)
+    _, model = prediction_model()
+    predict = combination_predictor(model, raw_data)
+    found = beam_search(
+        predict,
+        len(COLUMN_INTERVENTIONS),
+        top_k=top_k,
+        max_interventions=max_interventions,
+        required=intervention_indices(required),
+        excluded=intervention_indices(excluded),
+        beam_width=beam_width,
+    )
+    baseline_prediction = predict(np.zeros((1, len(COLUMN_INTERVENTIONS))))
+    return process_results(
+        baseline_prediction,
+        np.column_stack((found["combinations"], found["scores"])),
     )
-    result_order = result_matrix[:, -1].argsort()
-    result_matrix = result_matrix[result_order]
-    top_results = result_matrix[-3:, -8:]
-    return process_results(baseline_prediction, top_results)
+
+
+def run_with_model(model_name, func, payload):
+    """
+    Run a prediction function against a specific model.
+
+    Used by the inference executor with the model that was active when the
+    prediction was submitted. Worker processes keep their own registry and
+    switch it to that model; threads of the serving process only pin it for
+    this call, so a prediction queued before /model/change_model cannot
+    switch the process back to the previous model.
+
+    Args:
+        model_name (str): Name of the model to predict with
+        func: Prediction function such as score_clients
+        payload: Input passed to the prediction function
+
+    Returns:
+        The prediction function's result
+    """
+    if multiprocessing.parent_process() is not None:
+        if registry.active_name() != model_name:
+            load_model(model_name)
+        return func(payload)
+    _pinned_model.value = (model_name, registry.get(model_name))
+    try:
+        return func(payload)
+    finally:
+        _pinned_model.value = None
 
 
 if __name__ == "__main__":
@@ -4,112 +4,354 @@ Handles the preparation, training, and saving of the prediction model.
 """
 
 # Standard library imports
+import hashlib
+import json
+import multiprocessing
 import pickle
 import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # Third-party imports
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.ensemble import ExtraTreesRegressor
 from sklearn.ensemble import AdaBoostRegressor
 from app.clients.service.model_path import ModelPath
+from app.clients.service.tree_engine import (
+    FlatForest,
+    convert_pickle,
+    flat_artifact_path,
+    supported_ensembles,
+)
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 
-def prepare_models():
-    logging.info("DOCKER LOG: Preparing models")
+MODEL_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+TRAINING_DATA = os.path.join(MODEL_DIRECTORY, "data_commontool.csv")
+
+# Define feature columns
+FEATURE_COLUMNS = [
+    "age",  # Client's age
+    "gender",  # Client's gender (bool)
+    "work_experience",  # Years of work experience
+    "canada_workex",  # Years of work experience in Canada
+    "dep_num",  # Number of dependents
+    "canada_born",  # Born in Canada
+    "citizen_status",  # Citizenship status
+    "level_of_schooling",  # Highest level achieved (1-14)
+    "fluent_english",  # English fluency scale (1-10)
+    "reading_english_scale",  # Reading ability scale (1-10)
+    "speaking_english_scale",  # Speaking ability scale (1-10)
+    "writing_english_scale",  # Writing ability scale (1-10)
+    "numeracy_scale",  # Numeracy ability scale (1-10)
+    "computer_scale",  # Computer proficiency scale (1-10)
+    "transportation_bool",  # Needs transportation support (bool)
+    "caregiver_bool",  # Is primary caregiver (bool)
+    "housing",  # Housing situation (1-10)
+    "income_source",  # Source of income (1-10)
+    "felony_bool",  # Has a felony (bool)
+    "attending_school",  # Currently a student (bool)
+    "currently_employed",  # Currently employed (bool)
+    "substance_use",  # Substance use disorder (bool)
+    "time_unemployed",  # Years unemployed
+    "need_mental_health_support_bool",  # Needs mental health support (bool)
+]
+# Define intervention columns
+INTERVENTION_COLUMNS = [
+    "employment_assistance",
+    "life_stabilization",
+    "retention_services",
+    "specialized_services",
+    "employment_related_financial_supports",
+    "employer_financial_supports",
+    "enhanced_referrals",
+]
+TARGET_COLUMN = "success_rate"
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+# Models trained at the same time, each in its own process
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", str(os.cpu_count() or 1)))
+
+# Estimator class and hyperparameters of every trained artifact
+MODEL_SPECS = {
+    ModelPath.FOREST_REGRSSION: (
+        RandomForestRegressor,
+        {"n_estimators": 100, "random_state": 42},
+    ),
+    ModelPath.EXTRA_TREES_REGRESSOR: (
+        ExtraTreesRegressor,
+        {"n_estimators": 100, "random_state": 42},
+    ),
+    ModelPath.ADA_BOOST_REGRESSOR: (
+        AdaBoostRegressor,
+        {"n_estimators": 100, "random_state": 42},
+    ),
+}
+
+
+def file_digest(filename):
+    """
+    Hash a file's contents.
+
+    Args:
+        filename (str): File to hash
+
+    Returns:
+        str: Hex SHA-256 digest of the file
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as data_file:
+        for chunk in iter(lambda: data_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(model_path, data_digest):
+    """
+    Fingerprint everything that determines a trained artifact.
+
+    Args:
+        model_path (ModelPath): Artifact to fingerprint
+        data_digest (str): Digest of the training CSV
+
+    Returns:
+        str: Hex SHA-256 digest of the training inputs
     """
-    Prepare and train the Random Forest model using the dataset.
-    
+    estimator, params = MODEL_SPECS[model_path]
+    inputs = {
+        "data": data_digest,
+        "features": FEATURE_COLUMNS,
+        "interventions": INTERVENTION_COLUMNS,
+        "target": TARGET_COLUMN,
+        "split": {"test_size": TEST_SIZE, "random_state": RANDOM_STATE},
+        "estimator": estimator.__name__,
+        "params": params,
+        "sklearn": sklearn.__version__,
+    }
+    encoded = json.dumps(inputs, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def fingerprint_path(filename):
+    """Return the file storing the fingerprint of a model artifact."""
+    return os.path.splitext(filename)[0] + ".fingerprint"
+
+
+def is_up_to_date(filename, fingerprint):
+    """
+    Check whether an artifact was trained from the given fingerprint.
+
+    Args:
+        filename (str): Path of the model artifact
+        fingerprint (str): Fingerprint of the current training inputs
+
     Returns:
-        RandomForestRegressor: Trained model for predicting success rates
+        bool: True if the artifact exists and matches the fingerprint
+    """
+    try:
+        with open(fingerprint_path(filename), encoding="utf-8") as fingerprint_file:
+            stored = fingerprint_file.read().strip()
+    except FileNotFoundError:
+        return False
+    return stored == fingerprint and os.path.exists(filename)
+
+
+def load_training_data():
+    """
+    Load the training split of the dataset.
+
+    Returns:
+        tuple: Feature matrix and targets of the training split
     """
     # Load dataset
-    data = pd.read_csv("app/clients/service/data_commontool.csv")
-    # Define feature columns
-    feature_columns = [
-        "age",  # Client's age
-        "gender",  # Client's gender (bool)
-        "work_experience",  # Years of work experience
-        "canada_workex",  # Years of work experience in Canada
-        "dep_num",  # Number of dependents
-        "canada_born",  # Born in Canada
-        "citizen_status",  # Citizenship status
-        "level_of_schooling",  # Highest level achieved (1-14)
-        "fluent_english",  # English fluency scale (1-10)
-        "reading_english_scale",  # Reading ability scale (1-10)
-        "speaking_english_scale",  # Speaking ability scale (1-10)
-        "writing_english_scale",  # Writing ability scale (1-10)
-        "numeracy_scale",  # Numeracy ability scale (1-10)
-        "computer_scale",  # Computer proficiency scale (1-10)
-        "transportation_bool",  # Needs transportation support (bool)
-        "caregiver_bool",  # Is primary caregiver (bool)
-        "housing",  # Housing situation (1-10)
-        "income_source",  # Source of income (1-10)
-        "felony_bool",  # Has a felony (bool)
-        "attending_school",  # Currently a student (bool)
-        "currently_employed",  # Currently employed (bool)
-        "substance_use",  # Substance use disorder (bool)
-        "time_unemployed",  # Years unemployed
-        "need_mental_health_support_bool",  # Needs mental health support (bool)
-    ]
-    # Define intervention columns
-    intervention_columns = [
-        "employment_assistance",
-        "life_stabilization",
-        "retention_services",
-        "specialized_services",
-        "employment_related_financial_supports",
-        "employer_financial_supports",
-        "enhanced_referrals",
-    ]
+    data = pd.read_csv(TRAINING_DATA)
     # Combine all feature columns
-    all_features = feature_columns + intervention_columns
+    all_features = FEATURE_COLUMNS + INTERVENTION_COLUMNS
     # Prepare training data
     features = np.array(data[all_features])  # Changed from X to features
-    targets = np.array(data["success_rate"])  # Changed from y to targets
+    targets = np.array(data[TARGET_COLUMN])  # Changed from y to targets
     # Split the dataset
     features_train, _, targets_train, _ = train_test_split(  # Removed unused variables
-        features, targets, test_size=0.2, random_state=42
+        features, targets, test_size=TEST_SIZE, random_state=RANDOM_STATE
     )
-    # Initialize and train the model
-    forest_model = RandomForestRegressor(n_estimators=100, random_state=42)
-    forest_model.fit(features_train, targets_train)
+    return features_train, targets_train
 
-    extra_trees_model = ExtraTreesRegressor(n_estimators=100, random_state=42)
-    extra_trees_model.fit(features_train, targets_train)
 
-    ada_boost_model = AdaBoostRegressor(n_estimators=100, random_state=42)
-    ada_boost_model.fit(features_train, targets_train)
+def prepare_models(directory=MODEL_DIRECTORY, force=False):
+    """
+    Train the models whose artifacts are missing or out of date.
 
-    # Directory path
-    directory = os.path.dirname(os.path.abspath(__file__))
+    Each artifact is stored with a fingerprint of the training CSV, the
+    feature and intervention columns and its hyperparameters, so a restart
+    with unchanged inputs only checks files instead of retraining.
 
-    save_model(forest_model, os.path.join(directory, ModelPath.FOREST_REGRSSION.value))
-    save_model(
-        extra_trees_model,
-        os.path.join(directory, ModelPath.EXTRA_TREES_REGRESSOR.value),
-    )
-    save_model(
-        ada_boost_model, os.path.join(directory, ModelPath.ADA_BOOST_REGRESSOR.value)
+    Args:
+        directory (str): Directory the artifacts are stored in
+        force (bool): Retrain every model regardless of fingerprints
+
+    Returns:
+        list: ModelPath of every model that was retrained
+    """
+    logging.info("DOCKER LOG: Preparing models")
+    data_digest = file_digest(TRAINING_DATA)
+    stale = {}
+    for model_path, (estimator, _) in MODEL_SPECS.items():
+        filename = os.path.join(directory, model_path.value)
+        fingerprint = model_fingerprint(model_path, data_digest)
+        if force or not is_up_to_date(filename, fingerprint):
+            stale[model_path] = fingerprint
+        elif issubclass(estimator, supported_ensembles()) and not (
+            os.path.isdir(flat_artifact_path(filename))
+        ):
+            # Artifacts trained before the flat format only need converting
+            convert_pickle(filename)
+
+    if not stale:
+        logging.info("DOCKER LOG: All models are up to date, skipping training")
+        return []
+
+    features_train, targets_train = load_training_data()
+    workers = max(1, min(len(stale), TRAINING_WORKERS))
+    # Split the cores between concurrently trained models
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    jobs = [
+        (
+            *MODEL_SPECS[model_path],
+            features_train,
+            targets_train,
+            os.path.join(directory, model_path.value),
+            fingerprint,
+            n_jobs,
+        )
+        for model_path, fingerprint in stale.items()
+    ]
+    start = time.perf_counter()
+    if workers > 1:
+        # A fresh process per model, so each report's peak RSS is its own
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+        ) as pool:
+            reports = list(pool.map(train_model, *zip(*jobs)))
+    else:
+        reports = [train_model(*job) for job in jobs]
+
+    for model_path, report in zip(stale, reports):
+        logging.info(
+            "DOCKER LOG: Trained %s in %.2fs, peak RSS %.1f MiB",
+            model_path.name,
+            report["seconds"],
+            report["peak_rss_mb"],
+        )
+    logging.info(
+        "DOCKER LOG: Successfully created all models in %.2fs with %s worker(s)",
+        time.perf_counter() - start,
+        workers,
     )
-    logging.info("DOCKER LOG: Successfully created all models")
+    return list(stale)
+
+
+def train_model(
+    estimator, params, features_train, targets_train, filename, fingerprint, n_jobs
+):
+    """
+    Fit one model and save it with its fingerprint.
+
+    Runs in a training worker process, so everything it needs is passed in.
+
+    Args:
+        estimator: Estimator class to train
+        params (dict): Hyperparameters of the estimator
+        features_train (np.array): Training features
+        targets_train (np.array): Training targets
+        filename (str): Path to save the model artifact to
+        fingerprint (str): Fingerprint of the training inputs
+        n_jobs (int): Cores used to fit the estimators of a forest
+
+    Returns:
+        dict: Wall time in seconds and peak resident memory of the worker
+    """
+    start = time.perf_counter()
+    # Initialize and train the model
+    model = estimator(**params)
+    if "n_jobs" in model.get_params():
+        # Parallelism does not change the fitted trees, so it is not fingerprinted
+        model.set_params(n_jobs=n_jobs)
+    model.fit(features_train, targets_train)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=None)
+
+    save_model(model, filename)
+    # The fingerprint is written last so an interrupted save is retrained
+    write_atomically(fingerprint_path(filename), fingerprint.encode())
+    return {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident memory of the current process in MiB.
+
+    This is the highest value so far, so when models are trained one after
+    another in the same process it covers the earlier models too.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def write_atomically(filename, data):
+    """
+    Write a file through a temporary sibling and rename it into place, so
+    readers see either the old or the new contents, never a partial write.
+    The file and the rename are synced to disk, so a crash leaves the old
+    or the new contents as well.
+
+    Args:
+        filename (str): File to write
+        data (bytes): New contents of the file
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    temp_file = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+    try:
+        with temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.chmod(temp_file.name, 0o644)
+        os.replace(temp_file.name, filename)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
 
 
 def save_model(model, filename):
     """
-    Save the trained model to a file.
+    Save the trained model to a file, plus a memory-mappable flattened
+    copy for forests. Both are swapped in atomically.
 
     Args:
         model: Trained model to save
         filename (str): Name of the file to save the model to
     """
-    with open(filename, "wb") as model_file:
-        pickle.dump(model, model_file)
+    write_atomically(filename, pickle.dumps(model))
+    # Forests also get a flattened copy that workers can memory-map
+    if FlatForest.supports(model):
+        FlatForest.from_estimator(model).save(flat_artifact_path(filename))
 
 
 def load_model(filename):
@@ -0,0 +1,289 @@
+"""
+Model registry module for the Common Assessment Tool.
+Keeps every trained model resident in memory after its first load so the
+prediction path never reopens or unpickles artifacts from disk. Forests with
+a flattened artifact next to their pickle are memory-mapped instead of
+unpickled, which makes loading near instant and shares the trees between
+worker processes.
+"""
+
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+
+# Third-party imports
+import numpy as np
+
+from app.clients.service.model_path import ModelPath
+from app.clients.service.tree_engine import (
+    FLAT_METADATA,
+    FlatForest,
+    flat_artifact_path,
+)
+
+MODEL_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = "forest regression"
+# Models served by the flattened NumPy tree engine instead of sklearn predict
+FLAT_INFERENCE_MODELS = [
+    name.strip()
+    for name in os.getenv(
+        "FLAT_INFERENCE_MODELS", "forest regression,extra trees regression"
+    ).split(",")
+    if name.strip()
+]
+
+# Public model names accepted by the API, mapped to their artifacts
+MODEL_NAMES = {
+    "forest regression": ModelPath.FOREST_REGRSSION,
+    "extra trees regression": ModelPath.EXTRA_TREES_REGRESSOR,
+    "ada boost regression": ModelPath.ADA_BOOST_REGRESSOR,
+}
+
+
+def modification_time(path):
+    """Return a file's modification time, or None if it does not exist."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def resolve_model_path(model_name):
+    """
+    Map a public model name onto its ModelPath artifact.
+
+    Args:
+        model_name (str): Name of the model, case insensitive
+
+    Returns:
+        ModelPath: Artifact the model is stored in
+    """
+    try:
+        return MODEL_NAMES[model_name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown model '{model_name}'. "
+            f"Available models: {', '.join(MODEL_NAMES)}"
+        )
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+
+    Each artifact is loaded at most once, outside the registry lock: the
+    first request for a model loads it into a Future that concurrent
+    requests for the same model wait on. The active model is stored as a
+    single (name, model) tuple so switching models is an atomic swap that
+    in-flight predictions never observe half-done.
+    """
+
+    def __init__(
+        self,
+        directory=MODEL_DIRECTORY,
+        default_model=DEFAULT_MODEL,
+        flat_models=FLAT_INFERENCE_MODELS,
+    ):
+        self._directory = directory
+        self._default_model = default_model
+        self._flat_paths = {resolve_model_path(name) for name in flat_models}
+        self._lock = threading.Lock()
+        # Future of every model that is loaded or being loaded, resolving to
+        # the model and the modification times of the artifacts it came from
+        self._models = {}
+        self._active = None
+        # Cache hits, misses and the seconds each model took to load
+        self._stats = {"hits": 0, "misses": 0, "load_seconds": {}}
+
+    def _artifact_mtimes(self, model_path):
+        """Return the modification times of a model's pickle and flat artifact."""
+        path = os.path.join(self._directory, model_path.value)
+        paths = (path, os.path.join(flat_artifact_path(path), FLAT_METADATA))
+        return tuple(modification_time(path) for path in paths)
+
+    def _load(self, model_path):
+        """
+        Load a model artifact from disk.
+
+        Models opted in to the NumPy tree engine are mapped from their
+        flattened artifact when it is at least as new as the pickle, and
+        otherwise unpickled and flattened in memory. That includes a
+        flattened artifact that cannot be read, e.g. because FlatForest.save
+        is swapping it out.
+        """
+        path = os.path.join(self._directory, model_path.value)
+        if model_path in self._flat_paths:
+            flat_path = flat_artifact_path(path)
+            # The metadata file is written last, so its mtime dates the arrays
+            flat_mtime = modification_time(os.path.join(flat_path, FLAT_METADATA))
+            pickle_mtime = modification_time(path)
+            if flat_mtime is not None and (
+                pickle_mtime is None or flat_mtime >= pickle_mtime
+            ):
+                try:
+                    return FlatForest.load(flat_path)
+                except (OSError, ValueError):
+                    pass
+        try:
+            with open(path, "rb") as model_file:
+                model = pickle.load(model_file)
+        except FileNotFoundError:
+            raise RuntimeError(f"Model file not found at {path}.")
+        if model_path in self._flat_paths and FlatForest.supports(model):
+            return FlatForest.from_estimator(model)
+        return model
+
+    def get(self, model_name):
+        """
+        Return a resident model, loading it from disk on first use.
+
+        Args:
+            model_name (str): Name of the model to fetch
+
+        Returns:
+            The loaded model
+        """
+        model_path = resolve_model_path(model_name)
+        with self._lock:
+            pending = self._models.get(model_path)
+            if pending is None:
+                pending = self._models[model_path] = Future()
+                self._stats["misses"] += 1
+                loading = True
+            else:
+                self._stats["hits"] += 1
+                loading = False
+        if loading:
+            self._fill(model_path, pending)
+        return pending.result()[0]
+
+    def _fill(self, model_path, pending):
+        """Load a model into the Future that requests for it wait on."""
+        start = time.perf_counter()
+        try:
+            # Read first, so an artifact rewritten during the load counts as stale
+            mtimes = self._artifact_mtimes(model_path)
+            model = self._load(model_path)
+        except Exception as e:
+            with self._lock:
+                # Forget the failure so the next request tries again
+                if self._models.get(model_path) is pending:
+                    del self._models[model_path]
+            pending.set_exception(e)
+            return
+        with self._lock:
+            self._stats["load_seconds"][model_path.name] = time.perf_counter() - start
+        pending.set_result((model, mtimes))
+
+    def _resident(self):
+        """Return the models that finished loading, keyed by ModelPath."""
+        return {
+            path: pending.result()[0]
+            for path, pending in self._models.items()
+            if pending.done() and pending.exception() is None
+        }
+
+    def activate(self, model_name):
+        """
+        Make a model the one used for predictions.
+
+        The model is loaded before the swap, so a failed load leaves the
+        previously active model in place.
+
+        Args:
+            model_name (str): Name of the model to activate
+
+        Returns:
+            The newly active model
+        """
+        model = self.get(model_name)
+        self._active = (model_name.lower(), model)
+        return model
+
+    def active(self):
+        """
+        Return the (name, model) pair used for predictions.
+
+        The default model is activated lazily on first use.
+        """
+        active = self._active
+        if active is None:
+            self.activate(self._default_model)
+            return self._active
+        with self._lock:
+            self._stats["hits"] += 1
+        return active
+
+    def active_name(self):
+        """Return the name of the active model without loading it."""
+        active = self._active
+        return active[0] if active is not None else self._default_model
+
+    def is_loaded(self, model_name):
+        """Check whether a model is already resident in memory."""
+        pending = self._models.get(resolve_model_path(model_name))
+        return pending is not None and pending.done() and pending.exception() is None
+
+    def clear(self):
+        """
+        Drop every resident model, e.g. after artifacts were retrained.
+        The active model name is kept and reloaded on next use.
+        """
+        with self._lock:
+            active_name = self.active_name()
+            self._models = {}
+            self._active = None
+            self._default_model = active_name
+
+    def drop_stale(self):
+        """
+        Drop resident models whose artifacts changed since they were loaded,
+        e.g. because another server process retrained them.
+
+        Returns:
+            bool: Whether any model was dropped
+        """
+        with self._lock:
+            stale = [
+                path
+                for path, pending in self._models.items()
+                if pending.done()
+                and pending.exception() is None
+                and pending.result()[1] != self._artifact_mtimes(path)
+            ]
+            for path in stale:
+                del self._models[path]
+            active_name = self.active_name()
+            if resolve_model_path(active_name) in stale:
+                # Reloaded from the new artifacts on next use
+                self._active = None
+                self._default_model = active_name
+            return bool(stale)
+
+    def stats(self):
+        """Return hit/miss and load-time counters for the registry."""
+        with self._lock:
+            resident = self._resident()
+            return {
+                "active_model": self.active_name(),
+                "loaded_models": sorted(path.name for path in resident),
+                "flat_models": sorted(
+                    path.name
+                    for path, model in resident.items()
+                    if isinstance(model, FlatForest)
+                ),
+                "mapped_models": sorted(
+                    path.name
+                    for path, model in resident.items()
+                    if isinstance(model, FlatForest)
+                    and isinstance(model.value, np.memmap)
+                ),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "load_seconds": dict(self._stats["load_seconds"]),
+            }
+
+
+registry = ModelRegistry()
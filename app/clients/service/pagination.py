@@ -0,0 +1,63 @@
+"""
+Pagination helpers for client listings.
+Cursors are opaque tokens holding the last id a page returned, so the next
+page is a keyset seek on the primary key instead of an OFFSET scan.
+"""
+
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(last_id):
+    """
+    Build the cursor pointing just past a row.
+
+    Args:
+        last_id (int): Id of the last row on the current page
+
+    Returns:
+        str: URL-safe opaque cursor
+    """
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Read the id a cursor points past.
+
+    Args:
+        cursor (str): Cursor returned by a previous page
+
+    Returns:
+        int: Id the next page starts after
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded))["after"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        after = None
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return after
+
+
+def next_cursor(rows, limit):
+    """
+    Return the cursor of the page after ``rows``, or None on the last page.
+
+    Args:
+        rows (list): Rows of the current page, ordered by id
+        limit (int): Page size that was requested
+
+    Returns:
+        str: Cursor for the next page, or None
+    """
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].id)
@@ -1,13 +1,100 @@
 import os
+from functools import partial
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from app.clients.service.logic import interpret_and_calculate
+from pydantic import ValidationError
 from app.clients.schema import PredictionInput
+from app.clients.service.batcher import PredictionBatcher
+from app.clients.service.executor import InferenceQueueFull, inference_executor
+from app.clients.service.intervention_search import BEAM_WIDTH
 
-from app.clients.service.logic import get_current_model, list_all_models, load_model
+from app.clients.service.logic import (
+    COLUMN_INTERVENTIONS,
+    MAX_BATCH_SIZE,
+    ROWS_PER_CLIENT,
+    build_intervention_mask,
+    ensure_model_loaded,
+    get_current_model,
+    get_model_stats,
+    list_all_models,
+    load_model,
+    run_with_model,
+    score_clients,
+    search_interventions,
+    select_top_interventions,
+)
+from app.startup import startup_tasks
 
 router = APIRouter(prefix="/model", tags=["model logic"])
 
 
+async def run_inference(func, payload):
+    """Run a prediction on the inference executor instead of the event loop"""
+    try:
+        return await inference_executor.run(
+            run_with_model, get_current_model(), func, payload
+        )
+    except InferenceQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+
+
+async def score_batch(payloads):
+    """Score coalesced predictions with a single stacked model call"""
+    return await run_inference(score_clients, payloads)
+
+
+prediction_batcher = PredictionBatcher(score_batch)
+
+
+def require_model():
+    """Reject predictions until a model is prepared and can be loaded"""
+    if startup_tasks.is_running("models"):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Models are still loading",
+            headers={"Retry-After": "5"},
+        )
+    try:
+        ensure_model_loaded()
+    except RuntimeError as e:
+        # E.g. the startup task that trains the models failed
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+
+
+def intervention_constraints(
+    top_k: int = Query(
+        3, ge=1, le=ROWS_PER_CLIENT, description="Number of plans to return"
+    ),
+    max_interventions: Optional[int] = Query(
+        None,
+        ge=0,
+        le=len(COLUMN_INTERVENTIONS),
+        description="Maximum number of interventions in a plan",
+    ),
+    required: List[str] = Query([], description="Interventions every plan must use"),
+    excluded: List[str] = Query([], description="Interventions no plan may use"),
+):
+    """Collect and validate the constraints used to pick intervention plans"""
+    try:
+        build_intervention_mask(max_interventions, required, excluded)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {
+        "top_k": top_k,
+        "max_interventions": max_interventions,
+        "required": required,
+        "excluded": excluded,
+    }
+
+
 @router.get("/get_current_model")
 async def current_model():
     return {"name": get_current_model()}
@@ -18,12 +105,86 @@ async def all_models():
     return list_all_models()
 
 
+# A plain def runs on the threadpool, keeping the model load off the event loop
 @router.post("/change_model")
-async def change_model(model):
-    load_model(model)
+def change_model(model):
+    try:
+        load_model(model)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return {"message": f"Successfully changed model to: {model}"}
 
 
-@router.post("/predictions")
-async def predict(data: PredictionInput):
-    return interpret_and_calculate(data.model_dump())
+@router.get("/stats")
+async def model_stats():
+    return {**get_model_stats(), "batcher": prediction_batcher.stats()}
+
+
+@router.post("/predictions", dependencies=[Depends(require_model)])
+async def predict(
+    data: PredictionInput,
+    constraints: dict = Depends(intervention_constraints),
+    search: str = Query(
+        "exhaustive",
+        pattern="^(exhaustive|beam)$",
+        description="Score every plan, or grow plans with beam search",
+    ),
+    beam_width: int = Query(
+        BEAM_WIDTH, ge=1, le=ROWS_PER_CLIENT, description="Plans kept per size"
+    ),
+):
+    if search == "beam":
+        try:
+            return await run_inference(
+                partial(search_interventions, beam_width=beam_width, **constraints),
+                data.model_dump(),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    predictions = await prediction_batcher.submit(data.model_dump())
+    if isinstance(predictions, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=predictions["error"]
+        )
+    return select_top_interventions(predictions, **constraints)
+
+
+@router.post("/predictions/batch", dependencies=[Depends(require_model)])
+async def predict_batch(
+    inputs: List[Dict[str, Any]],
+    constraints: dict = Depends(intervention_constraints),
+):
+    """Generate predictions for many clients, reporting errors per input"""
+    if len(inputs) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch size cannot exceed {MAX_BATCH_SIZE} inputs",
+        )
+
+    results = [None] * len(inputs)
+    valid = []
+    for index, item in enumerate(inputs):
+        try:
+            valid.append((index, PredictionInput.model_validate(item).model_dump()))
+        except ValidationError as e:
+            messages = [
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            ]
+            results[index] = {"index": index, "error": "; ".join(messages)}
+
+    scored = await run_inference(score_clients, [item for _, item in valid])
+    for (index, _), predictions in zip(valid, scored):
+        if isinstance(predictions, dict):
+            results[index] = {"index": index, **predictions}
+        else:
+            results[index] = {
+                "index": index,
+                **select_top_interventions(predictions, **constraints),
+            }
+
+    return {
+        "results": results,
+        "errors": sum(1 for result in results if "error" in result),
+    }
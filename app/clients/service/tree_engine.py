@@ -0,0 +1,342 @@
+"""
+Tree engine module for the Common Assessment Tool.
+Flattens the fitted trees of averaging ensembles (RandomForest, ExtraTrees)
+into contiguous node arrays and evaluates every tree over a whole batch
+with vectorized NumPy traversal instead of per-estimator dispatch.
+
+Flattened forests can be saved as a directory of raw ``.npy`` arrays that
+are memory-mapped read-only on load, so every worker process shares the
+same page-cache copy of the trees instead of unpickling its own.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import sys
+
+# Third-party imports
+import numpy as np
+
+# On-disk layout of a flattened forest: one .npy file per node array
+FLAT_FORMAT_VERSION = 1
+FLAT_ARRAYS = ("left", "right", "feature", "threshold", "value", "roots", "is_leaf")
+FLAT_METADATA = "forest.json"
+
+
+def supported_ensembles():
+    """
+    Return the ensembles whose prediction is the plain mean of their trees.
+
+    scikit-learn is imported here rather than at module level, so serving
+    flattened artifacts never pays for importing it.
+    """
+    # Deferred so serving flattened artifacts never imports scikit-learn
+    # pylint: disable-next=import-outside-toplevel
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+    return (RandomForestRegressor, ExtraTreesRegressor)
+
+
+def flat_artifact_path(pickle_path):
+    """
+    Return the directory holding the flattened copy of a pickled model.
+
+    Args:
+        pickle_path (str): Path of the pickled model artifact
+
+    Returns:
+        str: Path of the matching ``.flat`` directory
+    """
+    return os.path.splitext(pickle_path)[0] + ".flat"
+
+
+# One attribute per node array of the flattened format
+class FlatForest:  # pylint: disable=too-many-instance-attributes
+    """
+    Averaging tree ensemble stored as flat node arrays.
+
+    Nodes of all trees live in the same arrays; ``roots`` holds the index of
+    each tree's first node. Leaves point back at themselves with an infinite
+    threshold, so a fixed number of vectorized steps equal to the deepest
+    tree brings every (sample, tree) pair to its leaf.
+    """
+
+    def __init__(
+        self, left, right, feature, threshold, value, roots, max_depth, is_leaf=None
+    ):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+
+    @staticmethod
+    def supports(model):
+        """Check whether a fitted model can be flattened."""
+        return isinstance(model, supported_ensembles())
+
+    @classmethod
+    def from_estimator(cls, model):
+        """
+        Flatten the fitted trees of a RandomForest or ExtraTrees regressor.
+
+        Args:
+            model: Fitted averaging ensemble with a single output
+
+        Returns:
+            FlatForest: Engine producing the same predictions as the model
+        """
+        if not cls.supports(model):
+            raise TypeError(f"Cannot flatten a {type(model).__name__} model")
+
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+        left, right, feature, threshold, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            value.append(tree.value[:, 0, 0])
+
+        return cls(
+            left=np.ascontiguousarray(np.concatenate(left), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(right), dtype=np.intp),
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(threshold)),
+            value=np.ascontiguousarray(np.concatenate(value)),
+            roots=np.asarray(offsets, dtype=np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+        )
+
+    def save(self, directory):
+        """
+        Write the node arrays as raw ``.npy`` files that load() can map.
+
+        The directory is replaced as a whole; while the swap happens it is
+        briefly missing, and the registry falls back to the pickle.
+
+        Args:
+            directory (str): Directory to create or overwrite
+        """
+        # Write a sibling directory and swap it in, so readers never map a
+        # mix of old and new arrays
+        directory = os.path.normpath(directory)
+        staging = f"{directory}.tmp{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in FLAT_ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+        metadata = {"format": FLAT_FORMAT_VERSION, "max_depth": int(self.max_depth)}
+        with open(
+            os.path.join(staging, FLAT_METADATA), "w", encoding="utf-8"
+        ) as metadata_file:
+            json.dump(metadata, metadata_file)
+
+        retired = f"{directory}.old{os.getpid()}"
+        if os.path.isdir(directory):
+            os.rename(directory, retired)
+        os.rename(staging, directory)
+        # Processes still mapping the old arrays keep them until they unmap
+        shutil.rmtree(retired, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Load a forest written by save().
+
+        The arrays are memory-mapped read-only by default, so loading only
+        reads the file headers and every process mapping the same files
+        shares one copy of the trees in the page cache.
+
+        Args:
+            directory (str): Directory written by save()
+            mmap (bool): Map the arrays instead of reading them into memory
+
+        Returns:
+            FlatForest: Engine backed by the stored arrays
+        """
+        with open(
+            os.path.join(directory, FLAT_METADATA), encoding="utf-8"
+        ) as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata.get("format") != FLAT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported flat forest format {metadata.get('format')} "
+                f"in {directory}"
+            )
+        arrays = {
+            name: np.load(
+                os.path.join(directory, f"{name}.npy"),
+                mmap_mode="r" if mmap else None,
+            )
+            for name in FLAT_ARRAYS
+        }
+        return cls(max_depth=metadata["max_depth"], **arrays)
+
+    @property
+    def n_trees(self):
+        """Number of trees in the ensemble."""
+        return len(self.roots)
+
+    def apply(self, features):
+        """
+        Find the leaf every sample reaches in every tree.
+
+        Args:
+            features (np.array): Matrix of shape (n_samples, n_features)
+
+        Returns:
+            np.array: Leaf node indices of shape (n_samples, n_trees)
+        """
+        # sklearn compares float32 features against float64 thresholds
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        n_samples, n_features = features.shape
+        flat_features = features.ravel()
+        row_offsets = (np.arange(n_samples) * n_features)[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], n_samples, axis=0)
+        for _ in range(self.max_depth):
+            values = flat_features.take(row_offsets + self.feature.take(nodes))
+            go_left = values <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes
+
+    def predict(self, features):
+        """
+        Predict with every tree and average the results.
+
+        Args:
+            features (np.array): Matrix of shape (n_samples, n_features)
+
+        Returns:
+            np.array: One prediction per sample
+        """
+        leaf_values = self.value[self.apply(features)]
+        # Accumulate tree by tree, in the same order sklearn does
+        predictions = np.zeros(leaf_values.shape[0])
+        for tree_values in leaf_values.T:
+            predictions += tree_values
+        predictions /= self.n_trees
+        return predictions
+
+    def predict_combinations(self, fixed_features, combinations):
+        """
+        Predict many rows that share their leading features in one tree walk.
+
+        Every tree is walked once: splits on the fixed leading features are
+        resolved directly, and only splits on the trailing free features
+        partition the set of combinations. This replaces one full traversal
+        per combination with a walk whose width is the number of distinct
+        leaves the combinations can reach. Several clients are walked
+        together as one frontier of (client, tree) entries.
+
+        Args:
+            fixed_features (np.array): Values of the leading features, or a
+                matrix of shape (n_clients, n_fixed) with one row per client
+            combinations (np.array): Matrix of shape (n_combinations, n_free)
+                holding the values of the trailing features for each row
+
+        Returns:
+            np.array: One prediction per combination, identical to predict()
+                on the concatenated rows, or one such row per client
+        """
+        fixed = np.asarray(fixed_features, dtype=np.float32)
+        single = fixed.ndim == 1
+        fixed = np.atleast_2d(fixed)
+        combinations = np.asarray(combinations, dtype=np.float32)
+        n_clients, n_fixed = fixed.shape
+        n_combinations = combinations.shape[0]
+
+        # Frontier of (client and tree entry, node, combinations still
+        # routed to that node); entry e is tree e % n_trees of client
+        # e // n_trees
+        entries = np.arange(n_clients * self.n_trees)
+        nodes = np.tile(self.roots, n_clients)
+        masks = np.ones((len(entries), n_combinations), dtype=bool)
+        leaf_values = np.empty((len(entries), n_combinations))
+
+        for _ in range(self.max_depth + 1):
+            at_leaf = self.is_leaf[nodes]
+            if at_leaf.any():
+                rows, columns = np.nonzero(masks[at_leaf])
+                leaf_values[entries[at_leaf][rows], columns] = self.value[
+                    nodes[at_leaf][rows]
+                ]
+                entries = entries[~at_leaf]
+                nodes, masks = nodes[~at_leaf], masks[~at_leaf]
+            if len(nodes) == 0:
+                break
+
+            feature = self.feature[nodes]
+            threshold = self.threshold[nodes]
+            is_free = feature >= n_fixed
+
+            # Splits on fixed features send the whole entry one way
+            fixed_values = fixed[entries // self.n_trees, np.where(is_free, 0, feature)]
+            children = np.where(
+                fixed_values <= threshold, self.left[nodes], self.right[nodes]
+            )
+
+            # Splits on free features divide the entry's combinations
+            free = np.nonzero(is_free)[0]
+            if len(free):
+                free_nodes = nodes[free]
+                goes_left = (
+                    combinations[:, feature[free] - n_fixed].T
+                    <= threshold[free, np.newaxis]
+                )
+                split_nodes = np.concatenate(
+                    (self.left[free_nodes], self.right[free_nodes])
+                )
+                split_masks = np.concatenate(
+                    (masks[free] & goes_left, masks[free] & ~goes_left)
+                )
+                split_entries = np.concatenate((entries[free], entries[free]))
+                routed = split_masks.any(axis=1)
+                keep = ~is_free
+                entries = np.concatenate((entries[keep], split_entries[routed]))
+                nodes = np.concatenate((children[keep], split_nodes[routed]))
+                masks = np.concatenate((masks[keep], split_masks[routed]))
+            else:
+                nodes = children
+
+        # Accumulate tree by tree, in the same order sklearn does
+        leaf_values = leaf_values.reshape((n_clients, self.n_trees, n_combinations))
+        predictions = np.zeros((n_clients, n_combinations))
+        for tree in range(self.n_trees):
+            predictions += leaf_values[:, tree]
+        predictions /= self.n_trees
+        return predictions[0] if single else predictions
+
+
+def convert_pickle(pickle_path):
+    """
+    Convert a pickled RandomForest or ExtraTrees artifact to the flat format.
+
+    Args:
+        pickle_path (str): Path of the pickled model artifact
+
+    Returns:
+        str: Directory the flattened forest was written to
+    """
+    with open(pickle_path, "rb") as model_file:
+        model = pickle.load(model_file)
+    directory = flat_artifact_path(pickle_path)
+    FlatForest.from_estimator(model).save(directory)
+    return directory
+
+
+def main(paths):
+    """Convert every pickled forest given on the command line."""
+    for path in paths:
+        print(f"{path} -> {convert_pickle(path)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,23 +5,235 @@ Handles database connection and session management using SQLAlchemy.
 
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 load_dotenv()
 
 # Here is where the database is located
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+# Async URL of the same database for the request handlers; derived from
+# DATABASE_URL when unset, which works for SQLite and PostgreSQL
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Connection pool of server databases such as PostgreSQL, per engine and
+# process: at most POOL_SIZE + MAX_OVERFLOW connections are open at once
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+# Test connections before handing them out, so ones dropped by the server
+# or a proxy are replaced instead of failing the request
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+# Replace connections older than this, below server and proxy idle limits
+DATABASE_POOL_RECYCLE_SECONDS = int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800"))
+
+# "tuned" switches SQLite files to write-ahead logging so readers are not
+# blocked by a writer; "default" keeps SQLite's rollback journal
+SQLITE_MODE = os.getenv("SQLITE_MODE", "tuned")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# How long a connection waits for a lock before failing with "database is locked"
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "5"))
+
+
+def is_sqlite_memory(url):
+    """Check whether a SQLite URL points at an in-memory database."""
+    return url.database in (None, "", ":memory:")
+
+
+def engine_options(url, sqlite_mode=SQLITE_MODE):
+    """
+    Build the create_engine arguments for a database.
+
+    Args:
+        url (str): Database URL
+        sqlite_mode (str): "tuned" or "default" for SQLite databases
+
+    Returns:
+        dict: Keyword arguments for create_engine or create_async_engine
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return {
+            "pool_size": DATABASE_POOL_SIZE,
+            "max_overflow": DATABASE_MAX_OVERFLOW,
+            "pool_pre_ping": DATABASE_POOL_PRE_PING,
+            "pool_recycle": DATABASE_POOL_RECYCLE_SECONDS,
+        }
+    if sqlite_mode not in ("tuned", "default"):
+        raise ValueError(f"Unknown SQLITE_MODE {sqlite_mode!r}")
+    connect_args = {"timeout": SQLITE_BUSY_TIMEOUT_SECONDS}
+    if url.get_driver_name() == "pysqlite":
+        connect_args["check_same_thread"] = False
+    return {"connect_args": connect_args}
+
+
+def tune_sqlite(engine, mmap_size=SQLITE_MMAP_SIZE):
+    """
+    Set the tuned SQLite pragmas on every new connection of an engine.
+
+    WAL lets readers keep reading the last committed data while a write is
+    in progress, and synchronous=NORMAL only syncs at checkpoints, which
+    stays safe against corruption under WAL. mmap_size reads pages through
+    memory mapping instead of read() calls.
+
+    Args:
+        engine (Engine): Synchronous engine, or AsyncEngine.sync_engine
+        mmap_size (int): Bytes of the database file to memory map
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_SECONDS * 1000)}")
+        cursor.close()
+
+
+def create_database_engine(url, sqlite_mode=SQLITE_MODE, **kwargs):
+    """
+    Create a synchronous engine with the configured pooling or SQLite mode.
+
+    Args:
+        url (str): Database URL
+        sqlite_mode (str): "tuned" or "default" for SQLite databases
+        **kwargs: Extra create_engine arguments, overriding the defaults
+
+    Returns:
+        Engine: SQLAlchemy engine
+    """
+    database_engine = create_engine(
+        url, **{**engine_options(url, sqlite_mode), **kwargs}
+    )
+    if _uses_tuned_sqlite(url, sqlite_mode):
+        tune_sqlite(database_engine)
+    return database_engine
+
+
+def create_async_database_engine(url, sqlite_mode=SQLITE_MODE, **kwargs):
+    """
+    Create an async engine for a database, using its async driver and the
+    same pooling or SQLite mode as create_database_engine.
+
+    Args:
+        url (str): Database URL, with a sync or async driver
+        sqlite_mode (str): "tuned" or "default" for SQLite databases
+        **kwargs: Extra create_async_engine arguments, overriding the defaults
+
+    Returns:
+        AsyncEngine: SQLAlchemy async engine
+    """
+    url = make_url(async_database_url(url))
+    options = engine_options(url, sqlite_mode)
+    if url.get_backend_name() == "sqlite" and not is_sqlite_memory(url):
+        # aiosqlite runs each connection on its own thread; keep them open
+        # between requests instead of reconnecting every time
+        options["poolclass"] = AsyncAdaptedQueuePool
+    database_engine = create_async_engine(url, **{**options, **kwargs})
+    if _uses_tuned_sqlite(url, sqlite_mode):
+        tune_sqlite(database_engine.sync_engine)
+    return database_engine
+
+
+def _uses_tuned_sqlite(url, sqlite_mode):
+    url = make_url(url)
+    return (
+        url.get_backend_name() == "sqlite"
+        and sqlite_mode == "tuned"
+        and not is_sqlite_memory(url)
+    )
+
 
 # Open up a connection so that we are able to use the database
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 
 # Bind the engine just created
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers used by the request handlers for each database backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url):
+    """
+    Switch a database URL to the async driver of its backend.
+
+    Args:
+        url (str): Database URL, e.g. sqlite:///./sql_app.db
+
+    Returns:
+        str: The same database through its async driver, e.g.
+            sqlite+aiosqlite:///./sql_app.db
+
+    Raises:
+        ValueError: If the backend has no known async driver and the URL
+            does not name one
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        if not url.get_dialect().is_async:
+            raise ValueError(
+                f"No async driver is known for {url.get_backend_name()} databases; "
+                "set ASYNC_DATABASE_URL to the database through an async driver, "
+                "e.g. mysql+aiomysql://..."
+            )
+        return url.render_as_string(hide_password=False)
+    if url.get_driver_name() == driver:
+        return url.render_as_string(hide_password=False)
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+# Async engines created so far, by database URL
+_async_engines = {}
+
+
+def get_async_engine(url=None):
+    """
+    Return the engine the request handlers await their queries on, so one
+    worker serves other requests while a query waits on the database.
+
+    It is created on first use, so importing this module and the sync
+    paths such as seeding keep working on backends without an async driver.
+
+    Args:
+        url (str): Database URL, defaults to ASYNC_DATABASE_URL or DATABASE_URL
+
+    Returns:
+        AsyncEngine: SQLAlchemy async engine
+    """
+    url = url or ASYNC_DATABASE_URL or SQLALCHEMY_DATABASE_URL
+    if url not in _async_engines:
+        _async_engines[url] = create_async_database_engine(url)
+    return _async_engines[url]
+
+
+def drop_inherited_connections():
+    """
+    Forget the pooled connections of every engine after a fork, without
+    closing them, since they still belong to the parent process.
+    """
+    engine.dispose(close=False)
+    for async_engine in _async_engines.values():
+        async_engine.sync_engine.dispose(close=False)
+
+
+async def dispose_async_engines():
+    """Close the connections of every async engine created so far."""
+    for async_engine in _async_engines.values():
+        await async_engine.dispose()
+
+
+# expire_on_commit is off so committed objects can still be serialized
+# without a lazy load, which AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
 # Create an object of our database so as to control the database
 Base = declarative_base()
 
@@ -38,3 +250,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Creates an async database session and ensures it's closed after use.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
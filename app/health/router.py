@@ -0,0 +1,48 @@
+"""
+Router module for health check endpoints.
+Liveness only confirms the process answers; readiness also checks the
+database connection and whether a model is loaded to serve predictions.
+"""
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.clients.service.model_registry import registry
+from app.database import get_db
+from app.startup import model_ready, startup_tasks
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+def ready(db: Session = Depends(get_db)):
+    try:
+        db.execute(text("SELECT 1"))
+        database = {"status": "ok"}
+    except Exception as e:
+        database = {"status": "error", "error": str(e)}
+
+    registry_stats = registry.stats()
+    models = {
+        "status": "ok" if model_ready() else "loading",
+        "active_model": registry_stats["active_model"],
+        "loaded_models": registry_stats["loaded_models"],
+    }
+    is_ready = database["status"] == "ok" and models["status"] == "ok"
+    return JSONResponse(
+        status_code=(
+            status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        content={
+            "status": "ready" if is_ready else "not ready",
+            "database": database,
+            "models": models,
+            "startup": startup_tasks.stats(),
+        },
+    )
@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 from dotenv import load_dotenv
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models import Client, User, ClientCase, UserRole
@@ -11,6 +12,106 @@ logging.basicConfig(level=logging.INFO)
 
 load_dotenv()
 
+SEED_DATA = "app/clients/service/data_commontool.csv"
+# Rows inserted per multi-row statement while seeding
+SEED_CHUNK_SIZE = int(os.getenv("SEED_CHUNK_SIZE", "5000"))
+
+CLIENT_INTEGER_COLUMNS = [
+    "age",
+    "gender",
+    "work_experience",
+    "canada_workex",
+    "dep_num",
+    "level_of_schooling",
+    "reading_english_scale",
+    "speaking_english_scale",
+    "writing_english_scale",
+    "numeracy_scale",
+    "computer_scale",
+    "housing",
+    "income_source",
+    "time_unemployed",
+]
+CLIENT_BOOLEAN_COLUMNS = [
+    "canada_born",
+    "citizen_status",
+    "fluent_english",
+    "transportation_bool",
+    "caregiver_bool",
+    "felony_bool",
+    "attending_school",
+    "currently_employed",
+    "substance_use",
+    "need_mental_health_support_bool",
+]
+CASE_BOOLEAN_COLUMNS = [
+    "employment_assistance",
+    "life_stabilization",
+    "retention_services",
+    "specialized_services",
+    "employment_related_financial_supports",
+    "employer_financial_supports",
+    "enhanced_referrals",
+]
+
+
+def load_seed_data(path=SEED_DATA):
+    """
+    Read the seed CSV and convert whole columns to their database types.
+
+    Args:
+        path (str): Path of the seed CSV
+
+    Returns:
+        DataFrame: Seed rows
+    """
+    df = pd.read_csv(path)
+    integer_columns = CLIENT_INTEGER_COLUMNS + ["success_rate"]
+    df[integer_columns] = (
+        df[integer_columns].apply(pd.to_numeric, errors="raise").astype("int64")
+    )
+    boolean_columns = CLIENT_BOOLEAN_COLUMNS + CASE_BOOLEAN_COLUMNS
+    df[boolean_columns] = df[boolean_columns].astype(bool)
+    return df
+
+
+def seed_clients(db: Session, df, user_id, chunk_size=SEED_CHUNK_SIZE):
+    """
+    Bulk insert seed clients and their cases into an empty clients table.
+
+    Seeding is skipped once any client exists, so clients deleted after
+    the first boot stay deleted. Each chunk is one multi-row insert for
+    clients and one for their cases, and the whole seed is committed as a
+    single transaction, so an interrupted run leaves the table empty and
+    the next boot seeds it from the start.
+
+    Args:
+        db (Session): Database session
+        df (DataFrame): Seed rows from load_seed_data
+        user_id (int): Case worker the seeded cases are assigned to
+        chunk_size (int): Rows inserted per statement
+
+    Returns:
+        int: Number of clients inserted
+    """
+    if db.scalar(select(Client.id).limit(1)) is not None:
+        return 0
+
+    client_columns = CLIENT_INTEGER_COLUMNS + CLIENT_BOOLEAN_COLUMNS
+    case_columns = CASE_BOOLEAN_COLUMNS + ["success_rate"]
+    for offset in range(0, len(df), chunk_size):
+        chunk = df.iloc[offset : offset + chunk_size]
+        # Ids come back in row order, so each case lines up with its client;
+        # SQLite can only return them one row per statement
+        client_ids = db.scalars(
+            insert(Client).returning(Client.id, sort_by_parameter_order=True),
+            chunk[client_columns].to_dict("records"),
+        ).all()
+        cases = chunk[case_columns].assign(client_id=client_ids, user_id=user_id)
+        db.execute(insert(ClientCase), cases.to_dict("records"))
+    db.commit()
+    return len(df)
+
 
 def initialize_database():
     print("Starting database initialization...")
@@ -60,80 +161,11 @@ def initialize_database():
 
         # Load CSV data
         print("Loading CSV data...")
-        df = pd.read_csv("app/clients/service/data_commontool.csv")
-
-        # Convert data types
-        integer_columns = [
-            "age",
-            "gender",
-            "work_experience",
-            "canada_workex",
-            "dep_num",
-            "level_of_schooling",
-            "reading_english_scale",
-            "speaking_english_scale",
-            "writing_english_scale",
-            "numeracy_scale",
-            "computer_scale",
-            "housing",
-            "income_source",
-            "time_unemployed",
-            "success_rate",
-        ]
-        for col in integer_columns:
-            df[col] = pd.to_numeric(df[col], errors="raise")
-
-        # Process each row in CSV
-        for index, row in df.iterrows():
-            # Create client
-            client = Client(
-                age=int(row["age"]),
-                gender=int(row["gender"]),
-                work_experience=int(row["work_experience"]),
-                canada_workex=int(row["canada_workex"]),
-                dep_num=int(row["dep_num"]),
-                canada_born=bool(row["canada_born"]),
-                citizen_status=bool(row["citizen_status"]),
-                level_of_schooling=int(row["level_of_schooling"]),
-                fluent_english=bool(row["fluent_english"]),
-                reading_english_scale=int(row["reading_english_scale"]),
-                speaking_english_scale=int(row["speaking_english_scale"]),
-                writing_english_scale=int(row["writing_english_scale"]),
-                numeracy_scale=int(row["numeracy_scale"]),
-                computer_scale=int(row["computer_scale"]),
-                transportation_bool=bool(row["transportation_bool"]),
-                caregiver_bool=bool(row["caregiver_bool"]),
-                housing=int(row["housing"]),
-                income_source=int(row["income_source"]),
-                felony_bool=bool(row["felony_bool"]),
-                attending_school=bool(row["attending_school"]),
-                currently_employed=bool(row["currently_employed"]),
-                substance_use=bool(row["substance_use"]),
-                time_unemployed=int(row["time_unemployed"]),
-                need_mental_health_support_bool=bool(
-                    row["need_mental_health_support_bool"]
-                ),
-            )
-            db.add(client)
-            db.commit()
-
-            # Create client_case
-            client_case = ClientCase(
-                client_id=client.id,
-                user_id=admin.id,  # Assign to admin
-                employment_assistance=bool(row["employment_assistance"]),
-                life_stabilization=bool(row["life_stabilization"]),
-                retention_services=bool(row["retention_services"]),
-                specialized_services=bool(row["specialized_services"]),
-                employment_related_financial_supports=bool(
-                    row["employment_related_financial_supports"]
-                ),
-                employer_financial_supports=bool(row["employer_financial_supports"]),
-                enhanced_referrals=bool(row["enhanced_referrals"]),
-                success_rate=int(row["success_rate"]),
-            )
-            db.add(client_case)
-            db.commit()
+        df = load_seed_data()
+        if seed_clients(db, df, admin.id):
+            print(f"Seeded {len(df)} clients")
+        else:
+            print("Clients already exist, skipping seed data")
 
         print("Database initialization completed successfully!")
         logging.info("DOCKER LOG: Database initialization completed successfully!")
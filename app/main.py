@@ -6,17 +6,19 @@ Handles database initialization and CORS middleware configuration.
 
 from fastapi import FastAPI
 from app import models
-from app.database import engine
+from app.database import dispose_async_engines, engine
+from app.migrations import create_missing_indexes
 from app.clients.router import router as clients_router
 from app.auth.router import router as auth_router
-from app.clients.service.router import router as model_router
+from app.clients.service.router import prediction_batcher, router as model_router
+from app.health.router import router as health_router
 from fastapi.middleware.cors import CORSMiddleware
-from app.initialize_data import initialize_database
-from app.clients.service.model import prepare_models
-import time
+from app.clients.service.executor import inference_executor
+from app.startup import start_background_startup
 
-# Initialize database tables
+# Initialize database tables, and indexes added to existing tables
 models.Base.metadata.create_all(bind=engine)
+create_missing_indexes(engine)
 
 # Create FastAPI application
 app = FastAPI(
@@ -29,6 +31,7 @@ app = FastAPI(
 app.include_router(auth_router)
 app.include_router(clients_router)
 app.include_router(model_router)
+app.include_router(health_router)
 
 # Configure CORS middleware
 app.add_middleware(
@@ -40,9 +43,15 @@ app.add_middleware(
 )
 
 
-# Triggers when app is actually instantiated and will asynchronously run
+# Triggers when app is actually instantiated; seeding and model preparation
+# run in the background so the server answers health checks right away
 @app.on_event("startup")
 async def startup_event():
-    time.sleep(5)
-    initialize_database()
-    prepare_models()
+    start_background_startup()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await prediction_batcher.shutdown()
+    inference_executor.shutdown()
+    await dispose_async_engines()
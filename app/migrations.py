@@ -0,0 +1,50 @@
+"""
+Schema migration module for the Common Assessment Tool.
+create_all only creates indexes together with new tables, so databases
+created before an index was declared in app.models never get it. This
+module creates every declared index that is missing and is safe to run on
+every start.
+
+Run it on its own with:
+    python -m app.migrations
+"""
+
+import logging
+
+from sqlalchemy import inspect
+
+from app import models
+from app.database import engine
+
+logging.basicConfig(level=logging.INFO)
+
+
+def create_missing_indexes(bind=engine):
+    """
+    Create the indexes declared on the models that the database lacks.
+
+    Args:
+        bind: Engine or connection to migrate
+
+    Returns:
+        list: Names of the indexes that were created
+    """
+    created = []
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table in models.Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+                    created.append(index.name)
+    for name in created:
+        logging.info("DOCKER LOG: Created index %s", name)
+    return created
+
+
+if __name__ == "__main__":
+    create_missing_indexes()
@@ -12,6 +12,7 @@ from sqlalchemy import (
     ForeignKey,
     CheckConstraint,
     Enum,
+    Index,
 )
 from sqlalchemy.orm import relationship
 import enum
@@ -86,6 +87,17 @@ class Client(Base):
 
     cases = relationship("ClientCase", back_populates="client")
 
+    __table_args__ = (
+        # Search by criteria: equality filters first, the age range last
+        Index(
+            "ix_clients_employed_schooling_age",
+            "currently_employed",
+            "level_of_schooling",
+            "age",
+        ),
+        Index("ix_clients_schooling_age", "level_of_schooling", "age"),
+    )
+
 
 class ClientCase(Base):
     __tablename__ = "client_cases"
@@ -106,3 +118,11 @@ class ClientCase(Base):
 
     client = relationship("Client", back_populates="cases")
     user = relationship("User", back_populates="cases")
+
+    __table_args__ = (
+        # The primary key leads with client_id, so lookups by case worker
+        # or by success rate need their own indexes; client_id is included
+        # so the join to clients is answered from the index alone
+        Index("ix_client_cases_user_id", "user_id", "client_id"),
+        Index("ix_client_cases_success_rate", "success_rate", "client_id"),
+    )
@@ -1,15 +1,126 @@
+"""
+Server entry point for the Common Assessment Tool.
+
+Development mode (the default) runs a single uvicorn process with
+auto-reload. Production mode runs gunicorn with uvicorn workers on uvloop
+and httptools; the master preloads the app and the trained models before
+forking, so workers share the loaded models copy-on-write. Seeding and
+training run in the workers' background startup once the server is
+listening, and a lock lets only one of them do the work.
+
+Select the mode with SERVER_MODE=production or --mode production.
+"""
+
+import argparse
+import os
+import sys
+
 import uvicorn
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+# Directory containing the app package, importable like uvicorn's --app-dir
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_MODE = os.getenv("SERVER_MODE", "development")
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+# Seconds an idle keep-alive connection stays open; keep above the load
+# balancer's idle timeout so it never reuses a connection we just closed
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", "75"))
+# Pending connections the kernel queues while every worker is busy
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+
+
+class ProductionWorker(UvicornWorker):
+    """Uvicorn worker pinned to the uvloop event loop and httptools parser."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master after a fork."""
+    # The app package is importable only once ProductionServer set sys.path
+    # pylint: disable-next=import-outside-toplevel
+    from app.database import drop_inherited_connections
+
+    drop_inherited_connections()
+
 
+class ProductionServer(BaseApplication):
+    """Gunicorn application serving app.main with preloaded models."""
 
-def start():
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        # If you're running in production, disable reload=True
-        # it's meant for development only and consumes more resources.
-        reload=True,
+    def __init__(self, options):
+        self.options = options
+        if PROJECT_ROOT not in sys.path:
+            sys.path.insert(0, PROJECT_ROOT)
+        super().__init__()
+
+    def init(self, parser, opts, args):
+        """Settings come from load_config, not the command line."""
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Imported here, after __init__ put the app package on sys.path
+        # pylint: disable=import-outside-toplevel
+        from app.main import app
+        from app.startup import preload
+
+        preload()
+        return app
+
+
+def production_options(
+    host=HOST, port=PORT, workers=WEB_CONCURRENCY, keep_alive=KEEP_ALIVE_SECONDS
+):
+    """
+    Build the gunicorn settings for production mode.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind
+        workers (int): Number of worker processes
+        keep_alive (int): Seconds to keep idle connections open
+
+    Returns:
+        dict: Gunicorn settings
+    """
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "app.run.ProductionWorker",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "keepalive": keep_alive,
+        "backlog": BACKLOG,
+        "accesslog": "-",
+    }
+
+
+def start(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Common Assessment Tool API")
+    parser.add_argument(
+        "--mode", choices=("development", "production"), default=SERVER_MODE
     )
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if args.mode == "production":
+        ProductionServer(production_options(args.host, args.port, args.workers)).run()
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            # Reload is meant for local development only and consumes more
+            # resources; production mode runs gunicorn workers instead
+            reload=True,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+"""
+Startup module for the Common Assessment Tool.
+Runs the slow startup work (database seeding, model training and loading)
+on background threads so the server accepts traffic and answers health
+checks right away, and records the progress of each task for readiness.
+"""
+
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from app.clients.service.logic import prediction_cache
+from app.clients.service.model_registry import registry
+from app.database import engine
+
+logging.basicConfig(level=logging.INFO)
+
+DATABASE_CONNECT_RETRIES = int(os.getenv("DATABASE_CONNECT_RETRIES", "30"))
+DATABASE_CONNECT_DELAY_SECONDS = float(os.getenv("DATABASE_CONNECT_DELAY_SECONDS", "1"))
+# Server processes on this host take their startup locks in this directory
+STARTUP_LOCK_DIRECTORY = os.getenv("STARTUP_LOCK_DIRECTORY", tempfile.gettempdir())
+
+
+class StartupTasks:
+    """
+    Tracks named background startup tasks.
+
+    A task moves from "pending" to "running" and ends "ready" or "failed".
+    Tasks that were never started report "idle", which is what tests and
+    scripts that skip the startup event see.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._threads = {}
+
+    def start(self, tasks):
+        """
+        Run each task on its own daemon thread.
+
+        Tasks that already finished successfully are skipped.
+
+        Args:
+            tasks (dict): Task names mapped to callables taking no arguments
+        """
+        for name, func in self._claim(tasks).items():
+            thread = threading.Thread(
+                target=self._run, args=(name, func), name=f"startup-{name}", daemon=True
+            )
+            self._threads[name] = thread
+            thread.start()
+
+    def _claim(self, tasks):
+        """Mark the tasks that still have to run as pending and return them."""
+        claimed = {}
+        with self._lock:
+            for name, func in tasks.items():
+                if self._tasks.get(name, {}).get("status") == "ready":
+                    continue
+                self._tasks[name] = {
+                    "status": "pending",
+                    "seconds": None,
+                    "error": None,
+                }
+                claimed[name] = func
+        return claimed
+
+    def _run(self, name, func):
+        """Run one task and record how it ended."""
+        start = time.perf_counter()
+        self._update(name, status="running")
+        try:
+            func()
+        except Exception as e:
+            logging.exception("DOCKER LOG: Startup task %s failed", name)
+            self._update(
+                name,
+                status="failed",
+                error=str(e),
+                seconds=time.perf_counter() - start,
+            )
+        else:
+            logging.info("DOCKER LOG: Startup task %s finished", name)
+            self._update(name, status="ready", seconds=time.perf_counter() - start)
+
+    def _update(self, name, **fields):
+        with self._lock:
+            self._tasks[name].update(fields)
+
+    def status(self, name):
+        """Return the status of a task, or "idle" if it was never started."""
+        with self._lock:
+            task = self._tasks.get(name)
+            return task["status"] if task else "idle"
+
+    def is_running(self, name):
+        """Check whether a task was started and has not finished yet."""
+        return self.status(name) in ("pending", "running")
+
+    def wait(self, timeout=None):
+        """
+        Block until every started task has finished.
+
+        Args:
+            timeout (float): Seconds to wait for each task
+
+        Returns:
+            bool: True if no task is still running
+        """
+        for thread in list(self._threads.values()):
+            thread.join(timeout)
+        return not any(self.is_running(name) for name in list(self._tasks))
+
+    def stats(self):
+        """Return the status, duration and error of every task."""
+        with self._lock:
+            return {name: dict(task) for name, task in self._tasks.items()}
+
+
+@contextmanager
+def startup_lock(name):
+    """
+    Hold an exclusive lock shared by every server process on this host.
+
+    Each production worker runs the startup tasks itself; the lock makes
+    the first one do the seeding or training while the others wait, and
+    then find the work already done.
+
+    Args:
+        name (str): Name of the startup step being guarded
+    """
+    path = os.path.join(STARTUP_LOCK_DIRECTORY, f"common-assessment-{name}.lock")
+    with open(path, "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def wait_for_database(
+    retries=DATABASE_CONNECT_RETRIES, delay=DATABASE_CONNECT_DELAY_SECONDS
+):
+    """
+    Wait until the database accepts connections.
+
+    Args:
+        retries (int): Connection attempts before giving up
+        delay (float): Seconds between attempts
+
+    Raises:
+        OperationalError: If the database is still unreachable
+    """
+    for attempt in range(1, retries + 1):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return
+        except Exception:
+            if attempt == retries:
+                raise
+            logging.info("DOCKER LOG: Waiting for database (%s/%s)", attempt, retries)
+            time.sleep(delay)
+
+
+def prepare_database():
+    """Wait for the database, then seed it."""
+    # Imported here so pandas is only loaded by the process that seeds
+    # pylint: disable-next=import-outside-toplevel
+    from app.initialize_data import initialize_database
+
+    wait_for_database()
+    with startup_lock("database"):
+        initialize_database()
+
+
+def prepare_model_registry():
+    """Train stale models, then load the active model into the registry."""
+    # The training code pulls in pandas and scikit-learn, which serving
+    # flattened forests does not need
+    # pylint: disable-next=import-outside-toplevel
+    from app.clients.service.model import prepare_models
+
+    with startup_lock("models"):
+        prepare_models()
+    # Models loaded before training finished, e.g. preloaded by the server
+    # master or through /model/change_model, may come from replaced artifacts
+    if registry.drop_stale():
+        prediction_cache.clear()
+    registry.activate(registry.active_name())
+
+
+startup_tasks = StartupTasks()
+
+
+def model_ready():
+    """Check that startup is not still preparing models and one is loaded."""
+    return not startup_tasks.is_running("models") and registry.is_loaded(
+        registry.active_name()
+    )
+
+
+STARTUP_TASKS = {"database": prepare_database, "models": prepare_model_registry}
+
+
+def start_background_startup():
+    """Start seeding the database and preparing models in the background."""
+    startup_tasks.start(STARTUP_TASKS)
+
+
+def preload():
+    """
+    Load the active model before the server forks its workers, so they
+    inherit it copy-on-write.
+
+    Seeding and training are left to the workers' background startup, so
+    the server binds and answers health checks first, and a failure there
+    shows up in readiness instead of being retried by every worker.
+    """
+    try:
+        registry.activate(registry.active_name())
+    except RuntimeError:
+        logging.info("DOCKER LOG: No trained model to preload yet")
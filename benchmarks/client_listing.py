@@ -0,0 +1,109 @@
+"""
+Benchmark for loading client listings as ORM objects or plain rows.
+
+Fills a scratch SQLite database with synthetic clients, then builds a
+listing response body through an AsyncSession the way the list endpoints
+did before and do now:
+
+- orm objects: Client instances, validated into ClientResponse models and
+  serialized, as FastAPI does for a response_model
+- column rows: rows of ClientService CLIENT_COLUMNS written out directly
+  by the router's RowsResponse
+
+Reports clients per second and peak traced memory for each.
+
+Run from the repository root:
+    python -m benchmarks.client_listing
+    python -m benchmarks.client_listing --clients 200000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from benchmarks.client_queries import populate
+from app.clients.router import RowsResponse, client_dicts
+from app.clients.schema import ClientResponse
+from app.clients.service.client_service import CLIENT_COLUMNS
+from app.models import Base, Client
+
+RESPONSE = TypeAdapter(List[ClientResponse])
+
+
+async def orm_objects(db):
+    """The previous path: ORM objects validated into response models."""
+    clients = (await db.scalars(select(Client).order_by(Client.id))).all()
+    body = RESPONSE.dump_json(RESPONSE.validate_python(clients, from_attributes=True))
+    return len(clients), body
+
+
+async def column_rows(db):
+    """The current path: plain rows serialized directly."""
+    clients = (await db.execute(select(*CLIENT_COLUMNS).order_by(Client.id))).all()
+    return len(clients), RowsResponse(client_dicts(clients)).body
+
+
+LISTINGS = {"orm objects": orm_objects, "column rows": column_rows}
+
+
+async def list_clients(async_engine, listing):
+    """Build one listing response body in a new session."""
+    async with AsyncSession(async_engine) as db:
+        return await listing(db)
+
+
+async def measure(async_engine, listing, repeat=3):
+    """
+    Time a listing and trace its peak memory.
+
+    Returns:
+        tuple: Clients per second of the fastest run, peak traced MB
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count, _ = await list_clients(async_engine, listing)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    await list_clients(async_engine, listing)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count / best, peak / 1e6
+
+
+async def report(async_engine, clients):
+    print(f"Listing {clients} clients")
+    print(f"{'listing':<14}{'clients/s':>12}{'peak MB':>10}")
+    for name, listing in LISTINGS.items():
+        per_second, peak_mb = await measure(async_engine, listing)
+        print(f"{name:<14}{per_second:>12.0f}{peak_mb:>10.1f}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        populate(engine, args.clients)
+        engine.dispose()
+        asyncio.run(
+            report(create_async_engine(f"sqlite+aiosqlite:///{path}"), args.clients)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark for the client search and case-worker queries.
+
+Fills a scratch SQLite database with synthetic clients (one case each),
+then times the ClientService queries and prints their query plans, first
+without the secondary indexes and again after create_missing_indexes.
+
+Run from the repository root:
+    python -m benchmarks.client_queries
+    python -m benchmarks.client_queries --clients 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.clients.service.client_service import ClientService
+from app.migrations import create_missing_indexes
+from app.models import Base, Client, ClientCase, User, UserRole
+
+CASE_WORKERS = 50
+CHUNK_SIZE = 50_000
+
+QUERIES = {
+    "criteria": lambda db: ClientService.get_clients_by_criteria(
+        db, employment_status=True, education_level=14, age_min=60
+    ),
+    "success_rate": lambda db: ClientService.get_clients_by_success_rate(
+        db, min_rate=100
+    ),
+    "case_worker": lambda db: ClientService.get_clients_by_case_worker(db, 7),
+}
+
+
+def populate(engine, clients, seed=0):
+    """Bulk insert synthetic clients and cases spread over the case workers."""
+    rng = np.random.default_rng(seed)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all(
+            User(
+                username=f"worker{i}",
+                email=f"worker{i}@example.com",
+                hashed_password="x",
+                role=UserRole.case_worker,
+            )
+            for i in range(CASE_WORKERS)
+        )
+        db.commit()
+
+    client_columns = [column.name for column in Client.__table__.columns]
+    case_columns = [column.name for column in ClientCase.__table__.columns]
+    client_sql = (
+        f"INSERT INTO clients ({', '.join(client_columns)}) "
+        f"VALUES ({', '.join('?' * len(client_columns))})"
+    )
+    case_sql = (
+        f"INSERT INTO client_cases ({', '.join(case_columns)}) "
+        f"VALUES ({', '.join('?' * len(case_columns))})"
+    )
+    ranges = {
+        "age": (18, 80),
+        "gender": (1, 3),
+        "level_of_schooling": (1, 15),
+        "housing": (1, 11),
+        "income_source": (1, 12),
+        "success_rate": (0, 101),
+        "user_id": (1, CASE_WORKERS + 1),
+    }
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for start in range(0, clients, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, clients - start)
+            ids = np.arange(start + 1, start + size + 1)
+
+            def column(name):
+                if name in ("id", "client_id"):
+                    return ids
+                low, high = ranges.get(name, (0, 11))
+                return rng.integers(low, high, size)
+
+            cursor.executemany(
+                client_sql,
+                zip(*(column(name).tolist() for name in client_columns)),
+            )
+            cursor.executemany(
+                case_sql,
+                zip(*(column(name).tolist() for name in case_columns)),
+            )
+            connection.commit()
+    finally:
+        connection.close()
+
+
+def run_query(async_engine, query):
+    """Run a service query in its own async session and return the rows."""
+
+    async def run():
+        async with AsyncSession(async_engine) as db:
+            return await query(db)
+
+    return asyncio.run(run())
+
+
+def captured_sql(async_engine, name):
+    """Run a service query and return the SQL and parameters it emitted."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run_query(async_engine, QUERIES[name])
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements[-1]
+
+
+def best_of(func, repeat=3):
+    """Return the fastest of repeated calls in seconds, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label, engine, async_engine):
+    """
+    Print, for every query, the time through ClientService (including ORM
+    loading), the time of its SQL alone, the row count and the query plan.
+    """
+    print(f"\n== {label} ==")
+    print(f"{'query':<14}{'service ms':>12}{'sql ms':>10}{'rows':>8}")
+    for name, query in QUERIES.items():
+
+        def run_service():
+            return run_query(async_engine, query)
+
+        statement, parameters = captured_sql(async_engine, name)
+        with engine.connect() as connection:
+
+            def run_sql():
+                return connection.exec_driver_sql(statement, parameters).fetchall()
+
+            service_seconds, rows = best_of(run_service)
+            sql_seconds, _ = best_of(run_sql)
+            plan = connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            steps = [row[-1] for row in plan]
+
+        print(
+            f"{name:<14}{service_seconds * 1000:>12.1f}"
+            f"{sql_seconds * 1000:>10.1f}{len(rows):>8}"
+        )
+        for step in steps:
+            print(f"{'':<16}{step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        # Start from the schema as it was before the indexes were declared
+        with engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.drop(connection)
+
+        start = time.perf_counter()
+        populate(engine, args.clients)
+        print(f"Inserted {args.clients} clients in {time.perf_counter() - start:.1f}s")
+        report("without indexes", engine, async_engine)
+
+        start = time.perf_counter()
+        created = create_missing_indexes(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        print(
+            f"\nCreated {len(created)} indexes and analyzed in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+        report("with indexes", engine, async_engine)
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark for building the intervention combination matrix.
+
+Compares the original per-request construction (copying the client row 128
+times and materializing itertools.product) with the precomputed intervention
+block written into a reused per-thread buffer.
+
+Run from the repository root:
+    python -m benchmarks.combinations
+"""
+
+import time
+import tracemalloc
+from itertools import product
+
+import numpy as np
+
+from app.clients.service.logic import (
+    clean_input_data,
+    combination_buffer,
+    create_matrix,
+    get_baseline_row,
+)
+
+SAMPLE_INPUT = {
+    "age": 23,
+    "gender": "1",
+    "work_experience": 1,
+    "canada_workex": 1,
+    "dep_num": 0,
+    "canada_born": "1",
+    "citizen_status": "2",
+    "level_of_schooling": "2",
+    "fluent_english": "3",
+    "reading_english_scale": 2,
+    "speaking_english_scale": 2,
+    "writing_english_scale": 3,
+    "numeracy_scale": 2,
+    "computer_scale": 3,
+    "transportation_bool": "2",
+    "caregiver_bool": "1",
+    "housing": "1",
+    "income_source": "5",
+    "felony_bool": "1",
+    "attending_school": "0",
+    "currently_employed": "1",
+    "substance_use": "1",
+    "time_unemployed": 1,
+    "need_mental_health_support_bool": "1",
+}
+
+
+def legacy_matrices(row_data):
+    """Original construction: baseline row plus a freshly built 128x31 matrix."""
+    baseline_row = np.concatenate((np.array(row_data), np.zeros(7))).reshape(1, -1)
+    data = [row_data.copy() for _ in range(128)]
+    perms = np.array(list(product([0, 1], repeat=7)))
+    return baseline_row, np.concatenate((np.array(data), np.array(perms)), axis=1)
+
+
+def buffered_matrices(row_data):
+    """Current construction: the baseline is the first row of the reused buffer."""
+    matrix = create_matrix(row_data, out=combination_buffer())
+    return matrix[:1], matrix
+
+
+def measure(build, row_data, iterations):
+    """
+    Return mean seconds per call, memory blocks allocated by one call that
+    are still alive after it returns, and peak traced bytes during the call.
+    """
+    build(row_data)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build(row_data)
+    seconds = (time.perf_counter() - start) / iterations
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.reset_peak()
+    result = build(row_data)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+    del result
+    blocks = sum(
+        stat.count_diff
+        for stat in after.compare_to(before, "lineno")
+        if stat.count_diff > 0
+    )
+    return seconds, blocks, peak
+
+
+def main(iterations=20000):
+    row_data = clean_input_data(SAMPLE_INPUT)
+    legacy = legacy_matrices(row_data)[1]
+    assert np.array_equal(legacy, buffered_matrices(row_data)[1])
+    assert np.array_equal(
+        legacy_matrices(row_data)[0], get_baseline_row(row_data)[None]
+    )
+
+    print(f"{'builder':<10} {'us/call':>10} {'blocks':>8} {'peak KiB':>10}")
+    for name, build in (("before", legacy_matrices), ("after", buffered_matrices)):
+        seconds, blocks, peak = measure(build, row_data, iterations)
+        print(f"{name:<10} {seconds * 1e6:>10.1f} {blocks:>8} {peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
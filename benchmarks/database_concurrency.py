@@ -0,0 +1,156 @@
+"""
+Concurrency benchmark for the SQLite modes in app.database.
+
+Fills a scratch SQLite database with synthetic clients, then runs reader
+threads paging through clients while one writer thread keeps updating
+batches of them, once per SQLITE_MODE. It reports read throughput and
+latency, completed write transactions and lock errors, showing how long
+readers wait behind the writer in each mode.
+
+Run from the repository root:
+    python -m benchmarks.database_concurrency
+    python -m benchmarks.database_concurrency --readers 16 --seconds 10
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.client_queries import populate
+from app.database import create_database_engine
+from app.models import Base, Client
+
+MODES = ("default", "tuned")
+PAGE_SIZE = 50
+WRITE_BATCH = 2000
+
+
+def read_pages(Session, clients, stop, latencies, errors, seed):
+    """Read random pages of clients until stopped, timing each one."""
+    rng = np.random.default_rng(seed)
+    while not stop.is_set():
+        after = int(rng.integers(0, clients))
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                query = (
+                    select(Client)
+                    .where(Client.id > after)
+                    .order_by(Client.id)
+                    .limit(PAGE_SIZE)
+                )
+                db.scalars(query).all()
+        except OperationalError:
+            errors.append("read")
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def write_batches(Session, clients, stop, commits, errors):
+    """Update batches of clients in one transaction each until stopped."""
+    rng = np.random.default_rng(0)
+    while not stop.is_set():
+        first = int(rng.integers(1, max(clients - WRITE_BATCH, 1)))
+        try:
+            with Session() as db:
+                db.execute(
+                    text(
+                        "UPDATE clients SET time_unemployed = time_unemployed + 1 "
+                        "WHERE id BETWEEN :first AND :last"
+                    ),
+                    {"first": first, "last": first + WRITE_BATCH},
+                )
+                db.commit()
+        except OperationalError:
+            errors.append("write")
+            continue
+        commits.append(1)
+
+
+def run_mode(path, mode, clients, readers, seconds):
+    """
+    Run the mixed workload against one database file in one SQLite mode.
+
+    Returns:
+        dict: Reads per second, p50 and p99 read latency in milliseconds,
+            writes per second and lock errors
+    """
+    engine = create_database_engine(
+        f"sqlite:///{path}", sqlite_mode=mode, pool_size=readers + 1
+    )
+    if mode == "default":
+        # A database stays in WAL once switched, so reset it explicitly
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=DELETE")
+    Session = sessionmaker(bind=engine)
+    stop = threading.Event()
+    latencies, commits, errors = [], [], []
+    threads = [
+        threading.Thread(
+            target=read_pages, args=(Session, clients, stop, latencies, errors, i)
+        )
+        for i in range(readers)
+    ]
+    threads.append(
+        threading.Thread(
+            target=write_batches, args=(Session, clients, stop, commits, errors)
+        )
+    )
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "reads_per_second": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else 0.0,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else 0.0,
+        "writes_per_second": len(commits) / seconds,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_database_engine(f"sqlite:///{path}", sqlite_mode="default")
+        Base.metadata.create_all(bind=engine)
+        populate(engine, args.clients)
+        engine.dispose()
+
+        print(
+            f"{args.readers} readers and 1 writer for {args.seconds:g}s "
+            f"on {args.clients} clients"
+        )
+        print(
+            f"{'mode':<10}{'reads/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+            f"{'writes/s':>10}{'errors':>8}"
+        )
+        for mode in MODES:
+            result = run_mode(path, mode, args.clients, args.readers, args.seconds)
+            print(
+                f"{mode:<10}{result['reads_per_second']:>10.0f}"
+                f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['writes_per_second']:>10.1f}{result['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold-start import benchmark.
+
+Imports a module in a fresh interpreter with ``python -X importtime`` and
+reports the total import time, the slowest modules by cumulative time and
+the self time spent per top-level package. Packages passed with --forbid
+make the run fail when they are imported, so CI can catch a heavy import
+creeping back onto the startup path.
+
+Run from the repository root:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module app.main --forbid sklearn pandas
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+HEAVY_PACKAGES = ("sklearn", "scipy", "pandas")
+
+
+def measure_imports(module):
+    """
+    Import a module in a new interpreter and parse the importtime report.
+
+    Args:
+        module (str): Dotted name of the module to import
+
+    Returns:
+        list: (module name, self microseconds, cumulative microseconds) for
+            every module imported, in import completion order
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    records = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        records.append((name.strip(), int(self_us), int(cumulative_us)))
+    return records
+
+
+def package_totals(records):
+    """Sum the self time of every module by its top-level package."""
+    totals = defaultdict(int)
+    for name, self_us, _ in records:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--forbid", nargs="*", default=list(HEAVY_PACKAGES))
+    args = parser.parse_args(argv)
+
+    records = measure_imports(args.module)
+    total_us = next(
+        cumulative for name, _, cumulative in records if name == args.module
+    )
+    print(f"import {args.module}: {total_us / 1000:.1f} ms, {len(records)} modules")
+
+    print(f"\n{'slowest modules (cumulative)':<60}{'ms':>10}")
+    for name, _, cumulative_us in sorted(records, key=lambda r: -r[2])[: args.top]:
+        print(f"{name:<60}{cumulative_us / 1000:>10.1f}")
+
+    print(f"\n{'packages (self time)':<60}{'ms':>10}")
+    totals = sorted(package_totals(records).items(), key=lambda item: -item[1])
+    for package, self_us in totals[: args.top]:
+        print(f"{package:<60}{self_us / 1000:>10.1f}")
+
+    imported = sorted(set(args.forbid) & set(package_totals(records)))
+    if imported:
+        print(f"\nForbidden packages imported: {', '.join(imported)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
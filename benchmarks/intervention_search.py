@@ -0,0 +1,45 @@
+"""
+Quality report for beam search against exhaustive intervention search.
+
+Runs both searches for every client in the training data on each trained
+model and reports the score gap of the plans beam search returns, along
+with how many combinations each search had to score.
+
+Run from the repository root after the models have been trained:
+    python -m benchmarks.intervention_search [beam_width ...]
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+from app.clients.service.intervention_search import compare_with_exhaustive
+from app.clients.service.logic import COLUMN_INTERVENTIONS
+from app.clients.service.model_registry import MODEL_DIRECTORY, MODEL_NAMES, registry
+
+
+def main(beam_widths=(2, 4, 8)):
+    data = pd.read_csv(os.path.join(MODEL_DIRECTORY, "data_commontool.csv"))
+    fixed_rows = data.iloc[:, :24].to_numpy(dtype=float)
+
+    print(
+        f"{'model':<24} {'beam':>4} {'best found':>10} {'max gap':>8} "
+        f"{'top-3 found':>11} {'mean gap':>9} {'rows':>6} {'exhaustive':>10}"
+    )
+    for model_name in MODEL_NAMES:
+        model = registry.get(model_name)
+        for beam_width in beam_widths:
+            report = compare_with_exhaustive(
+                model, fixed_rows, len(COLUMN_INTERVENTIONS), beam_width=beam_width
+            )
+            print(
+                f"{model_name:<24} {beam_width:>4} "
+                f"{report['best_plan_found']:>10.1%} {report['max_best_gap']:>8.3f} "
+                f"{report['top_k_found']:>11.1%} {report['mean_top_k_gap']:>9.4f} "
+                f"{report['beam_evaluated']:>6.1f} {report['exhaustive_evaluated']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(width) for width in sys.argv[1:]] or (2, 4, 8))
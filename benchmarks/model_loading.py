@@ -0,0 +1,70 @@
+"""
+Benchmark for loading the forest artifacts.
+
+Compares unpickling a forest and flattening it in memory with mapping the
+flattened artifact written next to the pickle. Private memory is what a
+load allocates on the Python heap; mapped pages live in the shared page
+cache instead, so they are paid once no matter how many workers map them.
+
+Run from the repository root after training the models:
+    python -m benchmarks.model_loading
+"""
+
+import os
+import pickle
+import time
+import tracemalloc
+
+from app.clients.service.model_registry import MODEL_DIRECTORY
+from app.clients.service.model_path import ModelPath
+from app.clients.service.tree_engine import (
+    FlatForest,
+    convert_pickle,
+    flat_artifact_path,
+)
+
+FOREST_ARTIFACTS = (ModelPath.FOREST_REGRSSION, ModelPath.EXTRA_TREES_REGRESSOR)
+
+
+def load_pickle(path):
+    """Original path: unpickle the estimator, then flatten it."""
+    with open(path, "rb") as model_file:
+        return FlatForest.from_estimator(pickle.load(model_file))
+
+
+def load_flat(path):
+    """Current path: map the flattened artifact read-only."""
+    return FlatForest.load(flat_artifact_path(path))
+
+
+def measure(load, path, iterations=5):
+    """Return mean seconds per load and bytes allocated by one load."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        load(path)
+    seconds = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    model = load(path)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return seconds, allocated
+
+
+def main():
+    print(f"{'model':<24}{'format':<8}{'load ms':>10}{'private MiB':>14}")
+    for model_path in FOREST_ARTIFACTS:
+        path = os.path.join(MODEL_DIRECTORY, model_path.value)
+        if not os.path.isdir(flat_artifact_path(path)):
+            convert_pickle(path)
+        for label, load in (("pickle", load_pickle), ("flat", load_flat)):
+            seconds, allocated = measure(load, path)
+            print(
+                f"{model_path.name:<24}{label:<8}"
+                f"{seconds * 1000:>10.1f}{allocated / 2**20:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
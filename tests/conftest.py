@@ -1,11 +1,18 @@
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.database import Base, async_database_url, get_async_db, get_db
 from app.main import app
 from app.auth.router import get_password_hash
 from app.models import User, UserRole, Client, ClientCase
+from app.clients.service import model as model_module
+from app.clients.service.client_service import client_counter
+from app.clients.service.logic import prediction_cache
+from app.clients.service.model_registry import DEFAULT_MODEL, registry
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +23,14 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# TestClient runs each request on a fresh event loop, so async connections
+# are not pooled across requests
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 
 @pytest.fixture
@@ -137,6 +152,7 @@ def test_db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        client_counter.invalidate()
 
 
 @pytest.fixture
@@ -147,11 +163,42 @@ def client(test_db):
         finally:
             test_db.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield TestClient(app)
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def count_queries():
+    """
+    Record the SQL statements the app runs inside a with block, e.g.
+
+        with count_queries() as statements:
+            client.get(...)
+        assert len(statements) == 3
+    """
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    return counter
+
+
 @pytest.fixture
 def admin_token(client):
     response = client.post(
@@ -176,3 +223,49 @@ def admin_headers(admin_token):
 @pytest.fixture
 def case_worker_headers(case_worker_token):
     return {"Authorization": f"Bearer {case_worker_token}"}
+
+
+@pytest.fixture(scope="session")
+def trained_models():
+    # Only retrains artifacts that are missing or out of date
+    model_module.prepare_models()
+    return model_module.MODEL_DIRECTORY
+
+
+@pytest.fixture
+def model_registry(trained_models):
+    registry.activate(DEFAULT_MODEL)
+    prediction_cache.clear()
+    yield registry
+    registry.activate(DEFAULT_MODEL)
+    prediction_cache.clear()
+
+
+@pytest.fixture
+def prediction_input():
+    return {
+        "age": 23,
+        "gender": "1",
+        "work_experience": 1,
+        "canada_workex": 1,
+        "dep_num": 0,
+        "canada_born": "1",
+        "citizen_status": "2",
+        "level_of_schooling": "2",
+        "fluent_english": "3",
+        "reading_english_scale": 2,
+        "speaking_english_scale": 2,
+        "writing_english_scale": 3,
+        "numeracy_scale": 2,
+        "computer_scale": 3,
+        "transportation_bool": "2",
+        "caregiver_bool": "1",
+        "housing": "1",
+        "income_source": "5",
+        "felony_bool": "1",
+        "attending_school": "0",
+        "currently_employed": "1",
+        "substance_use": "1",
+        "time_unemployed": 1,
+        "need_mental_health_support_bool": "1",
+    }
@@ -1,5 +1,30 @@
+import json
 import pytest
 from fastapi import status
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, select
+from app.main import app
+from app.models import Client, ClientCase, User, UserRole
+from app.clients.service import client_service
+
+
+def row_values(row):
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+
+def add_caseload(db, user_id, count):
+    """Assign count new copies of client 1 to a case worker"""
+    client = row_values(db.get(Client, 1))
+    del client["id"]
+    case = row_values(db.get(ClientCase, (1, 1)))
+    first = db.scalar(select(func.max(Client.id))) + 1  # pylint: disable=not-callable
+    ids = range(first, first + count)
+    db.execute(insert(Client), [{**client, "id": i} for i in ids])
+    db.execute(
+        insert(ClientCase),
+        [{**case, "client_id": i, "user_id": user_id} for i in ids],
+    )
+    db.commit()
 
 
 # Test GET Operations
@@ -19,6 +44,103 @@ def test_get_clients_as_admin(client, admin_headers):
     assert len(data["clients"]) > 0
 
 
+def test_get_clients_cursor_pagination(client, admin_headers):
+    """Test walking all clients with next_cursor instead of skip"""
+    response = client.get("/clients/", params={"limit": 1}, headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    first = response.json()
+    assert first["total"] == 2
+    assert [c["id"] for c in first["clients"]] == [1]
+
+    response = client.get(
+        "/clients/",
+        params={"limit": 1, "cursor": first["next_cursor"], "include_total": False},
+        headers=admin_headers,
+    )
+    second = response.json()
+    assert [c["id"] for c in second["clients"]] == [2]
+    assert second["total"] is None
+
+    response = client.get(
+        "/clients/",
+        params={"limit": 1, "cursor": second["next_cursor"]},
+        headers=admin_headers,
+    )
+    assert response.json()["clients"] == []
+    assert response.json()["next_cursor"] is None
+
+    # The skip/limit contract still returns the same pages
+    response = client.get(
+        "/clients/", params={"skip": 1, "limit": 1}, headers=admin_headers
+    )
+    assert [c["id"] for c in response.json()["clients"]] == [2]
+
+
+def test_get_clients_rejects_bad_cursors(client, admin_headers):
+    """Test invalid cursors and mixing skip with a cursor"""
+    response = client.get(
+        "/clients/", params={"cursor": "not-a-cursor"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    cursor = client.get("/clients/", params={"limit": 1}, headers=admin_headers).json()[
+        "next_cursor"
+    ]
+    response = client.get(
+        "/clients/", params={"skip": 1, "cursor": cursor}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_clients_total_follows_deletes(client, admin_headers):
+    """Test that the cached total is kept up to date by deletes"""
+    assert client.get("/clients/", headers=admin_headers).json()["total"] == 2
+    client.delete("/clients/2", headers=admin_headers)
+    assert client.get("/clients/", headers=admin_headers).json()["total"] == 1
+
+
+def test_client_listings_match_client_response(client, admin_headers):
+    """Test that listings built from plain rows have the ClientResponse shape"""
+    expected = client.get("/clients/1", headers=admin_headers).json()
+    listed = client.get("/clients/", headers=admin_headers).json()["clients"]
+    assert listed[0] == expected
+
+    searched = client.get(
+        "/clients/search/by-criteria", params={"age_min": 18}, headers=admin_headers
+    ).json()
+    assert searched[0] == expected
+
+    assigned = client.get("/clients/case-worker/1", headers=admin_headers).json()
+    assert assigned == [expected]
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/clients/", {}),
+        ("/clients/search/by-criteria", {"age_min": 18}),
+        ("/clients/search/by-services", {"employment_assistance": True}),
+        ("/clients/search/success-rate", {"min_rate": 0}),
+        ("/clients/case-worker/{case_worker_id}", {}),
+    ],
+)
+def test_client_listings_validate_against_response_model(
+    client, admin_headers, path, params
+):
+    """Test that listings skipping response_model validation still match it"""
+    route = next(r for r in app.routes if getattr(r, "path", None) == path)
+    response = client.get(
+        path.format(case_worker_id=1), params=params, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body
+
+    adapter = TypeAdapter(route.response_model)
+    validated = adapter.validate_json(response.content)
+    assert adapter.dump_python(validated, mode="json") == body
+
+
 def test_get_client_by_id(client, admin_headers):
     """Test getting specific client"""
     # Test existing client
@@ -70,6 +192,72 @@ def test_get_clients_by_services(client, admin_headers):
     assert len(response.json()) > 0
 
 
+def test_search_cursor_pagination(client, admin_headers):
+    """Test paging through search results with the X-Next-Cursor header"""
+    params = {"min_rate": 70, "limit": 1}
+    response = client.get(
+        "/clients/search/success-rate", params=params, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [c["id"] for c in response.json()] == [1]
+
+    params["cursor"] = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/clients/search/success-rate", params=params, headers=admin_headers
+    )
+    assert [c["id"] for c in response.json()] == [2]
+
+    params["cursor"] = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/clients/search/success-rate", params=params, headers=admin_headers
+    )
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get(
+        "/clients/search/by-services",
+        params={"employment_assistance": True, "cursor": "not-a-cursor"},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_search_ndjson_stream(client, admin_headers):
+    """Test streaming search results as one JSON client per line"""
+    listed = client.get(
+        "/clients/search/by-criteria", params={"age_min": 18}, headers=admin_headers
+    ).json()
+    response = client.get(
+        "/clients/search/by-criteria",
+        params={"age_min": 18, "format": "ndjson"},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == listed
+
+
+def test_search_ndjson_pages(client, admin_headers):
+    """Test paging limited NDJSON searches through the trailing cursor line"""
+    listed = client.get(
+        "/clients/search/by-criteria", params={"age_min": 18}, headers=admin_headers
+    ).json()
+    streamed, params = [], {"age_min": 18, "format": "ndjson", "limit": 1}
+    while True:
+        response = client.get(
+            "/clients/search/by-criteria", params=params, headers=admin_headers
+        )
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        if not lines or "next_cursor" not in lines[-1]:
+            streamed.extend(lines)
+            break
+        streamed.extend(lines[:-1])
+        params["cursor"] = lines[-1]["next_cursor"]
+    assert len(listed) > 1
+    assert streamed == listed
+
+
 def test_get_client_services(client, admin_headers):
     """Test getting services for a specific client"""
     response = client.get("/clients/1/services", headers=admin_headers)
@@ -79,6 +267,37 @@ def test_get_client_services(client, admin_headers):
     assert len(services) > 0
     assert "employment_assistance" in services[0]
     assert "success_rate" in services[0]
+    assert services[0]["case_worker"] == {
+        "id": 1,
+        "username": "testadmin",
+        "email": "testadmin@example.com",
+    }
+
+
+def test_get_client_services_query_count(client, admin_headers, test_db, count_queries):
+    """Test that case workers are loaded without a query per case"""
+    with count_queries() as one_case:
+        client.get("/clients/1/services", headers=admin_headers)
+
+    for i in range(20):
+        worker = User(
+            username=f"worker{i}",
+            email=f"worker{i}@example.com",
+            hashed_password="x",
+            role=UserRole.case_worker,
+        )
+        test_db.add(worker)
+        test_db.flush()
+        case = row_values(test_db.get(ClientCase, (1, 1)))
+        test_db.add(ClientCase(**{**case, "user_id": worker.id}))
+    test_db.commit()
+
+    with count_queries() as many_cases:
+        response = client.get("/clients/1/services", headers=admin_headers)
+    assert len(response.json()) == 21
+    assert {s["case_worker"]["username"] for s in response.json()} >= {"worker19"}
+    # The current user, then the cases joined with their case workers
+    assert len(one_case) == len(many_cases) == 2
 
 
 def test_get_clients_by_success_rate(client, admin_headers):
@@ -90,6 +309,21 @@ def test_get_clients_by_success_rate(client, admin_headers):
     assert len(response.json()) > 0
 
 
+def test_case_worker_caseload_query_count(
+    client, admin_headers, test_db, count_queries
+):
+    """Test that a large caseload costs the same number of queries"""
+    with count_queries() as small:
+        client.get("/clients/case-worker/2", headers=admin_headers)
+
+    add_caseload(test_db, user_id=2, count=500)
+    with count_queries() as large:
+        response = client.get("/clients/case-worker/2", headers=admin_headers)
+    assert len(response.json()) == 501
+    # The current user, the case worker and their clients
+    assert len(small) == len(large) == 3
+
+
 def test_get_clients_by_case_worker(client, admin_headers, case_worker_headers):
     """Test getting clients assigned to a case worker"""
     # Test as admin
@@ -113,15 +347,71 @@ def test_update_client(client, admin_headers):
     assert updated_client["time_unemployed"] == 0
 
 
+def test_update_client_missing(client, admin_headers):
+    """Test that updating a non-existent client returns 404"""
+    response = client.put("/clients/999", json={"age": 30}, headers=admin_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.put("/clients/999", json={}, headers=admin_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_update_client_services(client, admin_headers):
+    """Test updating the services of an existing case"""
+    response = client.put(
+        "/clients/1/services/1",
+        json={"retention_services": True, "success_rate": 90},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["retention_services"] == True
+    assert response.json()["success_rate"] == 90
+    assert response.json()["employment_assistance"] == True
+
+    response = client.put(
+        "/clients/1/services/2",
+        json={"success_rate": 90},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_writes_use_one_statement(client, admin_headers, count_queries):
+    """Test that updates and case assignments are single round trips"""
+    with count_queries() as update_client:
+        client.put("/clients/1", json={"age": 40}, headers=admin_headers)
+    with count_queries() as update_services:
+        client.put(
+            "/clients/1/services/1", json={"success_rate": 5}, headers=admin_headers
+        )
+    with count_queries() as create_case:
+        client.post(
+            "/clients/2/case-assignment",
+            params={"case_worker_id": 1},
+            headers=admin_headers,
+        )
+
+    # The current user, then the write itself
+    for statements in (update_client, update_services, create_case):
+        assert len(statements) == 2
+        assert "RETURNING" in statements[-1]
+
+
 # Test Create Case Assignment
-def test_create_case_assignment(client, admin_headers):
-    """Test creating new case assignment"""
+@pytest.mark.parametrize("on_conflict", [True, False])
+def test_create_case_assignment(client, admin_headers, monkeypatch, on_conflict):
+    """Test creating new case assignment, with and without ON CONFLICT"""
+    if not on_conflict:
+        monkeypatch.setattr(client_service, "DIALECT_INSERTS", {})
     response = client.post(
         "/clients/1/case-assignment",
         params={"case_worker_id": 2},
         headers=admin_headers,
     )
     assert response.status_code == status.HTTP_200_OK
+    assert response.json()["user_id"] == 2
+    assert response.json()["success_rate"] == 0
+    assert response.json()["employment_assistance"] == False
 
     # Test duplicate assignment
     response = client.post(
@@ -131,6 +421,23 @@ def test_create_case_assignment(client, admin_headers):
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+    # Test missing client or case worker
+    response = client.post(
+        "/clients/999/case-assignment",
+        params={"case_worker_id": 2},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Client with id 999 not found"
+
+    response = client.post(
+        "/clients/1/case-assignment",
+        params={"case_worker_id": 999},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Case worker with id 999 not found"
+
 
 # Test DELETE Operation
 def test_delete_client(client, admin_headers):
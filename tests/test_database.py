@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app import database
+from app.database import (
+    async_database_url,
+    create_database_engine,
+    engine_options,
+    get_async_db,
+    get_async_engine,
+)
+
+
+def test_async_database_url_switches_driver():
+    """Test that database URLs are mapped onto their async drivers"""
+    assert async_database_url("sqlite:///./sql_app.db") == (
+        "sqlite+aiosqlite:///./sql_app.db"
+    )
+    assert async_database_url("postgresql+psycopg2://user:pass@db/app") == (
+        "postgresql+asyncpg://user:pass@db/app"
+    )
+    assert async_database_url("sqlite+aiosqlite:///./sql_app.db") == (
+        "sqlite+aiosqlite:///./sql_app.db"
+    )
+
+
+def test_async_database_url_requires_async_driver():
+    """Test that backends without a known async driver fail with a clear error"""
+    with pytest.raises(ValueError, match="ASYNC_DATABASE_URL"):
+        async_database_url("mysql+pymysql://user:pass@db/app")
+    assert async_database_url("mysql+aiomysql://user:pass@db/app") == (
+        "mysql+aiomysql://user:pass@db/app"
+    )
+
+
+def test_async_engine_pools_tuned_sqlite(tmp_path, monkeypatch):
+    """Test the request handlers' engine as created outside the tests"""
+    monkeypatch.setattr(
+        database, "ASYNC_DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}"
+    )
+
+    async def scenario():
+        journal_modes = []
+        for _ in range(3):
+            sessions = get_async_db()
+            db = await anext(sessions)
+            journal_modes.append(await db.scalar(text("PRAGMA journal_mode")))
+            await sessions.aclose()
+        # One connection, kept open between sessions
+        checked_in = get_async_engine().pool.checkedin()
+        await database.dispose_async_engines()
+        return journal_modes, checked_in
+
+    journal_modes, checked_in = asyncio.run(scenario())
+    assert isinstance(get_async_engine().pool, AsyncAdaptedQueuePool)
+    assert journal_modes == ["wal"] * 3
+    assert checked_in == 1
+
+
+def test_engine_options_pool_server_databases():
+    """Test that pool settings only go to server databases"""
+    options = engine_options("postgresql://user:pass@db/app")
+    assert set(options) == {
+        "pool_size",
+        "max_overflow",
+        "pool_pre_ping",
+        "pool_recycle",
+    }
+    assert (
+        engine_options("sqlite:///./sql_app.db")["connect_args"]["check_same_thread"]
+        is False
+    )
+    assert (
+        "check_same_thread"
+        not in engine_options("sqlite+aiosqlite:///./sql_app.db")["connect_args"]
+    )
+
+
+def test_tuned_sqlite_sets_pragmas(tmp_path):
+    """Test that tuned SQLite connections use WAL and relaxed syncing"""
+    for sqlite_mode, journal_mode in (("tuned", "wal"), ("default", "delete")):
+        engine = create_database_engine(
+            f"sqlite:///{tmp_path / sqlite_mode}.db", sqlite_mode=sqlite_mode
+        )
+        with engine.connect() as connection:
+            pragmas = {
+                name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in ("journal_mode", "synchronous")
+            }
+        assert pragmas["journal_mode"] == journal_mode
+        if sqlite_mode == "tuned":
+            assert pragmas["synchronous"] == 1  # NORMAL
+        engine.dispose()
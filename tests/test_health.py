@@ -0,0 +1,130 @@
+import os
+import threading
+import pytest
+from fastapi import status
+from app import startup
+from app.clients.service import model as model_module
+from app.clients.service.logic import prediction_cache
+from app.clients.service.model_path import ModelPath
+from app.startup import (
+    STARTUP_TASKS,
+    StartupTasks,
+    preload,
+    prepare_model_registry,
+    startup_lock,
+    startup_tasks,
+)
+
+
+def test_liveness(client):
+    """Test that liveness answers without touching the database or models"""
+    response = client.get("/health/live")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness(client, model_registry):
+    """Test readiness once the database answers and a model is loaded"""
+    response = client.get("/health/ready")
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database"]["status"] == "ok"
+    assert body["models"]["active_model"] == "forest regression"
+
+
+def test_startup_tasks_record_outcomes():
+    """Test that background tasks report how they finished"""
+
+    def fail():
+        raise RuntimeError("boom")
+
+    tasks = StartupTasks()
+    assert tasks.status("models") == "idle"
+    tasks.start({"ok": lambda: None, "broken": fail})
+    assert tasks.wait(timeout=5)
+    stats = tasks.stats()
+    assert stats["ok"]["status"] == "ready"
+    assert stats["broken"] == {
+        "status": "failed",
+        "seconds": stats["broken"]["seconds"],
+        "error": "boom",
+    }
+
+
+def test_predictions_wait_for_model_startup(client, model_registry, prediction_input):
+    """Test that predictions answer 503 only while models are being prepared"""
+    release = threading.Event()
+    startup_tasks.start({"models": release.wait})
+    try:
+        response = client.post("/model/predictions", json=prediction_input)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "5"
+        response = client.get("/health/ready")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["models"]["status"] == "loading"
+        # Other endpoints keep serving during startup
+        assert client.get("/model/get_current_model").status_code == 200
+    finally:
+        release.set()
+        assert startup_tasks.wait(timeout=5)
+
+    response = client.post("/model/predictions", json=prediction_input)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_predictions_without_model_artifact(
+    client, model_registry, prediction_input, monkeypatch, tmp_path
+):
+    """Test that predictions answer 503 when no model could be prepared"""
+    monkeypatch.setattr(model_registry, "_directory", str(tmp_path))
+    model_registry.clear()
+    response = client.post("/model/predictions", json=prediction_input)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_preload_only_loads_models(model_registry, monkeypatch):
+    """Test that the server master loads the model but leaves seeding and
+    training to the workers' background startup"""
+    monkeypatch.setitem(STARTUP_TASKS, "database", lambda: pytest.fail("seeded"))
+    monkeypatch.setitem(STARTUP_TASKS, "models", lambda: pytest.fail("trained"))
+    model_registry.clear()
+    preload()
+    assert model_registry.is_loaded("forest regression")
+
+
+def test_startup_lock_serializes_processes(tmp_path, monkeypatch):
+    """Test that a startup step waits while another process runs it"""
+    monkeypatch.setattr(startup, "STARTUP_LOCK_DIRECTORY", str(tmp_path))
+    order = []
+    with startup_lock("models"):
+        waiter = threading.Thread(target=hold_lock, args=("models", order))
+        waiter.start()
+        waiter.join(0.1)
+        order.append("first")
+    waiter.join(5)
+    assert order == ["first", "second"]
+
+
+def hold_lock(name, order):
+    with startup_lock(name):
+        order.append("second")
+
+
+def test_retraining_drops_loaded_models(model_registry, monkeypatch):
+    """Test that models loaded before their artifacts were retrained are not kept"""
+    model_registry.get("ada boost regression")
+    prediction_cache.put(("stale",), "result")
+
+    def retrain():
+        path = os.path.join(
+            model_module.MODEL_DIRECTORY, ModelPath.ADA_BOOST_REGRESSOR.value
+        )
+        retrained = os.path.getmtime(path) + 1
+        os.utime(path, (retrained, retrained))
+
+    monkeypatch.setattr(model_module, "prepare_models", retrain)
+    prepare_model_registry()
+    assert model_registry.stats()["loaded_models"] == ["FOREST_REGRSSION"]
+    assert prediction_cache.stats()["entries"] == 0
@@ -0,0 +1,8 @@
+from benchmarks.import_time import HEAVY_PACKAGES, measure_imports, package_totals
+
+
+def test_app_startup_skips_heavy_imports():
+    """Test that importing the app does not load training-only libraries"""
+    records = measure_imports("app.main")
+    assert "app.main" in [name for name, _, _ in records]
+    assert not set(HEAVY_PACKAGES) & set(package_totals(records))
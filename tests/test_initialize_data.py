@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.initialize_data import load_seed_data, seed_clients
+from app.models import Client, ClientCase, User, UserRole
+
+
+@pytest.fixture
+def seed_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    admin = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password="x",
+        role=UserRole.admin,
+    )
+    db.add(admin)
+    db.commit()
+    yield db, admin.id
+    db.close()
+    engine.dispose()
+
+
+def test_load_seed_data_converts_columns():
+    """Test that whole columns are converted to integer and boolean dtypes"""
+    df = load_seed_data()
+    assert df["age"].dtype == "int64"
+    assert df["success_rate"].dtype == "int64"
+    assert df["canada_born"].dtype == bool
+    assert df["enhanced_referrals"].dtype == bool
+
+
+def test_seed_clients_is_bulk_and_idempotent(seed_session):
+    """Test chunked bulk inserts that do not duplicate clients when rerun"""
+    db, admin_id = seed_session
+    df = load_seed_data()
+    case_inserts, commits = [], []
+    event.listen(
+        db.bind,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: case_inserts.append(statement)
+        if statement.startswith("INSERT INTO client_cases")
+        else None,
+    )
+    event.listen(db.bind, "commit", commits.append)
+
+    assert seed_clients(db, df, admin_id, chunk_size=100) == len(df)
+    # One case statement per chunk and a single commit, not two per row
+    assert len(case_inserts) == 2
+    assert len(commits) == 1
+    assert seed_clients(db, df, admin_id, chunk_size=100) == 0
+    # pylint: disable-next=not-callable
+    assert db.scalar(select(func.count(Client.id))) == len(df)
+    # pylint: disable-next=not-callable
+    assert db.scalar(select(func.count()).select_from(ClientCase)) == len(df)
+
+    first = db.get(Client, 1)
+    assert first.age == df["age"][0]
+    assert first.canada_born is bool(df["canada_born"][0])
+    assert first.cases[0].user_id == admin_id
+
+
+def test_seed_clients_interrupted_run_is_redone(seed_session):
+    """Test that a seed failing partway leaves no clients behind"""
+    db, admin_id = seed_session
+    df = load_seed_data()
+    case_inserts = []
+
+    def fail_second_chunk(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO client_cases"):
+            case_inserts.append(statement)
+            if len(case_inserts) == 2:
+                raise RuntimeError("interrupted")
+
+    event.listen(db.bind, "before_cursor_execute", fail_second_chunk)
+    with pytest.raises(RuntimeError):
+        seed_clients(db, df, admin_id, chunk_size=100)
+    db.rollback()
+    event.remove(db.bind, "before_cursor_execute", fail_second_chunk)
+
+    assert db.get(Client, 1) is None
+    assert seed_clients(db, df, admin_id, chunk_size=100) == len(df)
+
+
+def test_seed_clients_skips_non_empty_tables(seed_session):
+    """Test that deleted seed clients are not inserted again on the next boot"""
+    db, admin_id = seed_session
+    df = load_seed_data()
+    seed_clients(db, df.iloc[:50], admin_id)
+    first = db.get(Client, 1)
+    db.delete(first.cases[0])
+    db.delete(first)
+    db.commit()
+
+    assert seed_clients(db, df, admin_id) == 0
+    assert db.get(Client, 1) is None
+    # pylint: disable-next=not-callable
+    assert db.scalar(select(func.count(Client.id))) == 49
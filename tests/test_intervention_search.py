@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from fastapi import status
+from app.clients.service.intervention_search import (
+    beam_search,
+    compare_with_exhaustive,
+    exhaustive_search,
+)
+from app.clients.service.logic import COLUMN_INTERVENTIONS, clean_input_data
+
+
+def additive_predictor(weights, interaction=0.0):
+    """Score plans by summed weights, with a penalty on large plans"""
+
+    def predict(combinations):
+        sizes = combinations.sum(axis=1)
+        return combinations @ weights - interaction * sizes**2
+
+    return predict
+
+
+def test_beam_search_scales_beyond_exhaustive():
+    """Test that beam search finds the best plans of 18 interventions cheaply"""
+    weights = np.random.default_rng(0).normal(size=18)
+    predict = additive_predictor(weights, interaction=0.3)
+
+    found = beam_search(predict, 18, top_k=3, beam_width=4)
+    exact = exhaustive_search(predict, 18, top_k=3)
+    np.testing.assert_allclose(found["scores"], exact["scores"])
+    assert found["evaluated"] < exact["evaluated"] / 100
+
+
+def test_beam_search_respects_constraints():
+    """Test budget, required and excluded constraints in beam search"""
+    weights = np.arange(10, dtype=float)
+    found = beam_search(
+        additive_predictor(weights),
+        10,
+        top_k=5,
+        max_interventions=3,
+        required=[0],
+        excluded=[9],
+    )
+    for plan in found["combinations"]:
+        assert plan.sum() <= 3
+        assert plan[0] == 1
+        assert plan[9] == 0
+    assert list(np.flatnonzero(found["combinations"][-1])) == [0, 7, 8]
+
+
+def test_beam_search_quality_on_trained_model(model_registry, prediction_input):
+    """Test that beam search matches exhaustive search on the 7 interventions"""
+    _, model = model_registry.active()
+    fixed_rows = np.array([clean_input_data(prediction_input)], dtype=float)
+    report = compare_with_exhaustive(
+        model, fixed_rows, len(COLUMN_INTERVENTIONS), beam_width=8
+    )
+    assert report["max_best_gap"] == pytest.approx(0)
+    assert report["beam_evaluated"] < report["exhaustive_evaluated"]
+
+
+def test_predictions_beam_search(client, model_registry, prediction_input):
+    """Test the beam search mode of the predictions endpoint"""
+    exhaustive = client.post("/model/predictions", json=prediction_input).json()
+    response = client.post(
+        "/model/predictions", params={"search": "beam"}, json=prediction_input
+    )
+    assert response.status_code == status.HTTP_200_OK
+    beam = response.json()
+    assert beam["baseline"] == pytest.approx(exhaustive["baseline"])
+    assert beam["interventions"][-1][0] == pytest.approx(
+        exhaustive["interventions"][-1][0]
+    )
+
+    response = client.post(
+        "/model/predictions", params={"search": "random"}, json=prediction_input
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_compare_with_exhaustive_fewer_plans_than_top_k(
+    model_registry, prediction_input
+):
+    """Test the comparison when a narrow beam finds fewer plans than top_k"""
+    _, model = model_registry.active()
+    fixed_rows = np.array([clean_input_data(prediction_input)], dtype=float)
+    report = compare_with_exhaustive(
+        model,
+        fixed_rows,
+        len(COLUMN_INTERVENTIONS),
+        top_k=20,
+        max_interventions=2,
+        beam_width=1,
+    )
+    assert report["beam_evaluated"] == 14
+    assert report["exhaustive_evaluated"] == 29
+    assert report["mean_top_k_gap"] >= 0
@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine, inspect
+from app.database import Base
+from app.migrations import create_missing_indexes
+
+
+def test_create_missing_indexes_is_idempotent(tmp_path):
+    """Test that indexes missing from existing tables are created once"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(connection)
+
+    assert sorted(create_missing_indexes(engine)) == [
+        "ix_client_cases_success_rate",
+        "ix_client_cases_user_id",
+        "ix_clients_employed_schooling_age",
+        "ix_clients_schooling_age",
+    ]
+    assert not create_missing_indexes(engine)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("client_cases")}
+    assert "ix_client_cases_user_id" in indexes
+
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT clients.id FROM clients "
+            "JOIN client_cases ON clients.id = client_cases.client_id "
+            "WHERE client_cases.user_id = 1"
+        ).fetchall()
+    assert any("ix_client_cases_user_id" in row[-1] for row in plan)
+    engine.dispose()
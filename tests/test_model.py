@@ -0,0 +1,510 @@
+import asyncio
+import pickle
+import threading
+import numpy as np
+import pytest
+from fastapi import status
+from app.clients.service.batcher import PredictionBatcher
+from app.clients.service.executor import (
+    InferenceExecutor,
+    InferenceQueueFull,
+    inference_executor,
+)
+from app.clients.service.logic import (
+    COLUMN_INTERVENTIONS,
+    INTERVENTION_MATRIX,
+    MAX_BATCH_SIZE,
+    PredictionCache,
+    clean_input_data,
+    combination_buffer,
+    create_matrix,
+    get_baseline_row,
+    get_current_model,
+    load_model,
+    interpret_and_calculate,
+    interpret_and_calculate_batch,
+    prediction_cache,
+    run_with_model,
+    score_clients,
+    select_top_interventions,
+)
+
+
+def test_predictions(client, model_registry, prediction_input):
+    """Test generating predictions with the default model"""
+    response = client.post("/model/predictions", json=prediction_input)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "baseline" in data
+    assert len(data["interventions"]) == 3
+
+
+def test_predictions_use_resident_model(client, model_registry, prediction_input):
+    """Test that repeated predictions never reload the model from disk"""
+    client.post("/model/predictions", json=prediction_input)
+    misses = model_registry.stats()["misses"]
+    hits = model_registry.stats()["hits"]
+
+    for _ in range(3):
+        response = client.post("/model/predictions", json=prediction_input)
+        assert response.status_code == status.HTTP_200_OK
+
+    stats = client.get("/model/stats").json()["registry"]
+    assert stats["misses"] == misses
+    assert stats["hits"] >= hits + 3
+
+
+def test_model_load_does_not_block_predictions(model_registry, monkeypatch):
+    """Test that a slow model load leaves the active model usable"""
+    release = threading.Event()
+    unpickled = []
+    load = pickle.load
+
+    def slow_load(model_file):
+        release.wait(5)
+        unpickled.append(model_file.name)
+        return load(model_file)
+
+    model_registry.clear()
+    model_registry.active()
+    monkeypatch.setattr(pickle, "load", slow_load)
+    loaders = [
+        threading.Thread(target=model_registry.get, args=("ada boost regression",))
+        for _ in range(2)
+    ]
+    for loader in loaders:
+        loader.start()
+    try:
+        # Returns right away while the other model is still loading
+        assert model_registry.active()[0] == "forest regression"
+        assert not model_registry.is_loaded("ada boost regression")
+    finally:
+        release.set()
+        for loader in loaders:
+            loader.join()
+    assert model_registry.is_loaded("ada boost regression")
+    # Both requests shared a single load
+    assert len(unpickled) == 1
+
+
+def test_change_model(client, model_registry):
+    """Test switching the active model"""
+    response = client.post(
+        "/model/change_model", params={"model": "extra trees regression"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/model/get_current_model")
+    assert response.json()["name"] == "extra trees regression"
+    assert model_registry.is_loaded("extra trees regression")
+
+
+def test_change_model_unknown(client, model_registry):
+    """Test switching to a model that does not exist keeps the current one"""
+    response = client.post("/model/change_model", params={"model": "linear"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get("/model/get_current_model")
+    assert response.json()["name"] == "forest regression"
+
+
+def test_batch_predictions(client, model_registry, prediction_input):
+    """Test that batch predictions match single predictions"""
+    other_input = dict(prediction_input, age=45, housing="4")
+    single = [
+        client.post("/model/predictions", json=data).json()
+        for data in (prediction_input, other_input)
+    ]
+
+    response = client.post(
+        "/model/predictions/batch", json=[prediction_input, other_input]
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["errors"] == 0
+    for index, result in enumerate(data["results"]):
+        assert result["index"] == index
+        assert result["baseline"] == pytest.approx(single[index]["baseline"])
+        assert result["interventions"] == single[index]["interventions"]
+
+
+def test_batch_predictions_single_predict_call(model_registry, prediction_input):
+    """Test that a batch is scored with exactly one predict call"""
+    _, model = model_registry.active()
+    calls = []
+    original_predict = model.predict
+
+    def counting_predict(features):
+        calls.append(features.shape)
+        return original_predict(features)
+
+    model.predict = counting_predict
+    try:
+        results = interpret_and_calculate_batch(
+            [prediction_input] * 4, strategy="predict"
+        )
+    finally:
+        del model.predict
+    assert calls == [(4 * 128, 31)]
+    assert len(results) == 4
+
+
+def test_batch_partial_evaluation_single_walk(model_registry, prediction_input):
+    """Test that a partially evaluated batch shares one tree walk"""
+    _, model = model_registry.active()
+    calls = []
+    original = model.predict_combinations
+
+    def counting_predict_combinations(fixed_features, combinations):
+        calls.append(np.shape(fixed_features))
+        return original(fixed_features, combinations)
+
+    model.predict_combinations = counting_predict_combinations
+    try:
+        inputs = [dict(prediction_input, age=age) for age in (20, 30, 40, 50)]
+        results = interpret_and_calculate_batch(inputs, strategy="partial")
+    finally:
+        del model.predict_combinations
+    assert calls == [(4, 24)]
+    prediction_cache.clear()
+    assert results == interpret_and_calculate_batch(inputs, strategy="predict")
+
+
+def test_batch_predictions_item_errors(client, model_registry, prediction_input):
+    """Test that invalid inputs are reported without failing the batch"""
+    missing_age = dict(prediction_input)
+    del missing_age["age"]
+    bad_housing = dict(prediction_input, housing="somewhere")
+
+    response = client.post(
+        "/model/predictions/batch",
+        json=[prediction_input, missing_age, bad_housing],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["errors"] == 2
+    assert "baseline" in data["results"][0]
+    assert "age" in data["results"][1]["error"]
+    assert "Invalid value" in data["results"][2]["error"]
+
+
+def test_batch_predictions_size_cap(client, model_registry, prediction_input):
+    """Test that oversized batches are rejected"""
+    response = client.post(
+        "/model/predictions/batch", json=[prediction_input] * (MAX_BATCH_SIZE + 1)
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_predictions_cached(client, model_registry, prediction_input):
+    """Test that a repeated assessment is served from the prediction cache"""
+    first = client.post("/model/predictions", json=prediction_input).json()
+    second = client.post("/model/predictions", json=prediction_input).json()
+    assert first == second
+
+    stats = client.get("/model/stats").json()["cache"]
+    assert stats["hits"] >= 1
+    assert stats["entries"] == 1
+    assert 0 < stats["hit_ratio"] <= 1
+
+
+def test_change_model_clears_cache(client, model_registry, prediction_input):
+    """Test that switching models invalidates cached predictions"""
+    client.post("/model/predictions", json=prediction_input)
+    assert prediction_cache.stats()["entries"] == 1
+
+    client.post("/model/change_model", params={"model": "ada boost regression"})
+    assert prediction_cache.stats()["entries"] == 0
+
+
+def test_prediction_cache_eviction_and_expiry():
+    """Test the cache evicts least recently used and expired entries"""
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    expired = PredictionCache(max_entries=2, ttl_seconds=0)
+    expired.put("a", 1)
+    assert expired.get("a") is None
+    assert expired.stats()["entries"] == 0
+
+
+def test_inference_executor_rejects_when_full():
+    """Test that predictions beyond the queue capacity are rejected"""
+    executor = InferenceExecutor("thread", workers=1, queue_size=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        waiting = asyncio.ensure_future(executor.run(release.wait, 5))
+        # The event loop keeps running while both predictions are blocked
+        await asyncio.sleep(0.05)
+        assert executor.stats()["in_flight"] == 2
+        assert executor.stats()["queue_depth"] == 1
+
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(release.wait, 5)
+
+        release.set()
+        assert await running and await waiting
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["max_queue_depth"] == 1
+
+
+def test_inference_executor_counts_failures_and_cancellations():
+    """Test that failed predictions are not counted as completed and that a
+    cancelled request keeps its slot until the running prediction ends"""
+    executor = InferenceExecutor("thread", workers=1, queue_size=0)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0)
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        await asyncio.sleep(0.05)
+        assert executor.stats()["in_flight"] == 1
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(release.wait, 5)
+        release.set()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["in_flight"] == 0
+    assert stats["failed"] == 1
+    assert stats["completed"] == 1
+
+
+def test_queued_prediction_keeps_changed_model(model_registry, prediction_input):
+    """Test that a prediction queued before a model change does not revert it"""
+    executor = InferenceExecutor("thread", workers=1, queue_size=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = asyncio.ensure_future(
+            executor.run(
+                run_with_model, "forest regression", score_clients, [prediction_input]
+            )
+        )
+        await asyncio.sleep(0.05)
+        load_model("ada boost regression")
+        release.set()
+        await running
+        return await queued
+
+    try:
+        predictions = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert get_current_model() == "ada boost regression"
+    key = PredictionCache.make_key(
+        "forest regression", np.asarray(clean_input_data(prediction_input), dtype=float)
+    )
+    np.testing.assert_array_equal(prediction_cache.get(key), predictions[0])
+
+
+def test_predictions_queue_full(client, model_registry, prediction_input):
+    """Test that a full inference queue returns 503"""
+    saved = inference_executor.workers, inference_executor.queue_size
+    inference_executor.workers, inference_executor.queue_size = 0, 0
+    try:
+        response = client.post("/model/predictions", json=prediction_input)
+    finally:
+        inference_executor.workers, inference_executor.queue_size = saved
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def test_batcher_coalesces_concurrent_predictions():
+    """Test that concurrent requests inside the window share one batch"""
+    batches = []
+
+    async def run_batch(payloads):
+        batches.append(list(payloads))
+        return [payload * 10 for payload in payloads]
+
+    batcher = PredictionBatcher(run_batch, window_ms=20, max_batch_size=8)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert batcher.stats()["batch_sizes"] == {"5": 1}
+
+
+def test_batcher_shutdown_scores_waiting_requests():
+    """Test that shutdown flushes the open window and waits for its batch"""
+    batches = []
+
+    async def run_batch(payloads):
+        await asyncio.sleep(0.01)
+        batches.append(list(payloads))
+        return payloads
+
+    batcher = PredictionBatcher(run_batch, window_ms=10_000, max_batch_size=8)
+
+    async def scenario():
+        waiting = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0)
+        await batcher.shutdown()
+        assert batches == [[1]]
+        return await waiting
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_batcher_flushes_at_max_batch_size():
+    """Test that a full batch is scored without waiting for the window"""
+    batches = []
+
+    async def run_batch(payloads):
+        batches.append(len(payloads))
+        return payloads
+
+    batcher = PredictionBatcher(run_batch, window_ms=20, max_batch_size=2)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert batches == [2, 2, 1]
+    stats = batcher.stats()
+    assert stats["batches"] == 3
+    assert stats["requests"] == 5
+
+
+def test_batcher_propagates_errors():
+    """Test that a failed batch fails every request waiting on it"""
+
+    async def run_batch(payloads):
+        raise RuntimeError("model unavailable")
+
+    batcher = PredictionBatcher(run_batch, window_ms=5, max_batch_size=4)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(1), batcher.submit(2), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_predictions_invalid_value(client, model_registry, prediction_input):
+    """Test that inputs that cannot be converted to features return 400"""
+    response = client.post(
+        "/model/predictions", json=dict(prediction_input, housing="somewhere")
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("model_name", ["forest regression", "ada boost regression"])
+def test_prediction_strategies_agree(model_registry, prediction_input, model_name):
+    """Test that partial evaluation returns the same results as full predict"""
+    model_registry.activate(model_name)
+    full = interpret_and_calculate(prediction_input, strategy="predict")
+    prediction_cache.clear()
+    partial = interpret_and_calculate(prediction_input, strategy="partial")
+    assert partial == full
+
+
+def test_prediction_strategy_unknown(model_registry, prediction_input):
+    """Test that an unknown prediction strategy is rejected"""
+    with pytest.raises(ValueError):
+        interpret_and_calculate(prediction_input, strategy="guess")
+
+
+def test_intervention_matrix_is_constant(prediction_input):
+    """Test the shared intervention block is read-only and reused per thread"""
+    assert INTERVENTION_MATRIX.shape == (128, 7)
+    assert not INTERVENTION_MATRIX.flags.writeable
+    assert not INTERVENTION_MATRIX[0].any()
+
+    row_data = clean_input_data(prediction_input)
+    buffer = combination_buffer()
+    matrix = create_matrix(row_data, out=buffer)
+    assert matrix is buffer
+    assert combination_buffer() is buffer
+    assert (matrix[:, :24] == row_data).all()
+    assert (matrix[:, 24:] == INTERVENTION_MATRIX).all()
+    # The first combination is the baseline row
+    assert (matrix[0] == get_baseline_row(row_data)).all()
+
+
+def test_predictions_top_k(client, model_registry, prediction_input):
+    """Test requesting more plans than the default top 3"""
+    response = client.post(
+        "/model/predictions", params={"top_k": 5}, json=prediction_input
+    )
+    assert response.status_code == status.HTTP_200_OK
+    scores = [score for score, _ in response.json()["interventions"]]
+    assert len(scores) == 5
+    assert scores == sorted(scores)
+
+
+def test_predictions_constraints(client, model_registry, prediction_input):
+    """Test budget, required and excluded intervention constraints"""
+    required = COLUMN_INTERVENTIONS[0]
+    excluded = COLUMN_INTERVENTIONS[3]
+    response = client.post(
+        "/model/predictions",
+        params={
+            "max_interventions": 2,
+            "required": [required],
+            "excluded": [excluded],
+        },
+        json=prediction_input,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    for _, names in response.json()["interventions"]:
+        assert len(names) <= 2
+        assert required in names
+        assert excluded not in names
+
+
+def test_select_top_interventions_matches_sort():
+    """Test the masked argpartition against a full sort of the allowed plans"""
+    predictions = np.random.default_rng(0).random(128)
+    result = select_top_interventions(predictions, top_k=4, max_interventions=3)
+
+    allowed = np.flatnonzero(INTERVENTION_MATRIX.sum(axis=1) <= 3)
+    best = allowed[np.argsort(predictions[allowed])[-4:]]
+    assert [score for score, _ in result["interventions"]] == list(predictions[best])
+    assert result["baseline"] == predictions[0]
+
+
+def test_predictions_invalid_constraints(client, model_registry, prediction_input):
+    """Test that unknown or contradictory interventions are rejected"""
+    response = client.post(
+        "/model/predictions",
+        params={"required": ["Job Fair"]},
+        json=prediction_input,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post(
+        "/model/predictions",
+        params={
+            "required": [COLUMN_INTERVENTIONS[1]],
+            "excluded": [COLUMN_INTERVENTIONS[1]],
+        },
+        json=prediction_input,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
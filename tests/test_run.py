@@ -0,0 +1,35 @@
+from app import run
+
+
+def test_production_mode_runs_gunicorn(monkeypatch):
+    """Test that production mode starts preloaded gunicorn uvicorn workers"""
+    started = {}
+
+    class FakeServer:
+        def __init__(self, options):
+            started.update(options)
+
+        def run(self):
+            started["ran"] = True
+
+    monkeypatch.setattr(run, "ProductionServer", FakeServer)
+    run.start(["--mode", "production", "--workers", "4", "--port", "9000"])
+    assert started["ran"]
+    assert started["workers"] == 4
+    assert started["bind"] == "0.0.0.0:9000"
+    assert started["preload_app"] is True
+    assert started["worker_class"] == "app.run.ProductionWorker"
+    assert run.ProductionWorker.CONFIG_KWARGS == {
+        "loop": "uvloop",
+        "http": "httptools",
+    }
+
+
+def test_development_mode_reloads(monkeypatch):
+    """Test that development mode keeps a single reloading uvicorn process"""
+    calls = []
+    monkeypatch.setattr(run.uvicorn, "run", lambda *a, **kw: calls.append((a, kw)))
+    run.start(["--mode", "development"])
+    assert calls == [
+        (("app.main:app",), {"host": "0.0.0.0", "port": 8000, "reload": True})
+    ]
@@ -0,0 +1,114 @@
+import os
+import shutil
+import pytest
+from sklearn.ensemble import (
+    AdaBoostRegressor,
+    ExtraTreesRegressor,
+    RandomForestRegressor,
+)
+from app.clients.service import model as model_module
+from app.clients.service.model_path import ModelPath
+from app.clients.service.tree_engine import flat_artifact_path
+
+
+@pytest.fixture
+def training_setup(tmp_path, monkeypatch):
+    # Small ensembles trained from a private copy of the dataset
+    data = tmp_path / "data_commontool.csv"
+    shutil.copy(model_module.TRAINING_DATA, data)
+    monkeypatch.setattr(model_module, "TRAINING_DATA", str(data))
+    monkeypatch.setattr(
+        model_module,
+        "MODEL_SPECS",
+        {
+            ModelPath.FOREST_REGRSSION: (
+                RandomForestRegressor,
+                {"n_estimators": 5, "random_state": 42},
+            ),
+            ModelPath.EXTRA_TREES_REGRESSOR: (
+                ExtraTreesRegressor,
+                {"n_estimators": 5, "random_state": 42},
+            ),
+            ModelPath.ADA_BOOST_REGRESSOR: (
+                AdaBoostRegressor,
+                {"n_estimators": 5, "random_state": 42},
+            ),
+        },
+    )
+    return tmp_path
+
+
+def test_prepare_models_skips_up_to_date_artifacts(training_setup):
+    """Test that unchanged training inputs do not retrain anything"""
+    assert len(model_module.prepare_models(training_setup)) == 3
+    for model_path in ModelPath:
+        filename = os.path.join(training_setup, model_path.value)
+        assert os.path.exists(filename)
+        assert os.path.exists(model_module.fingerprint_path(filename))
+    assert not model_module.prepare_models(training_setup)
+    assert len(model_module.prepare_models(training_setup, force=True)) == 3
+
+
+def test_prepare_models_retrains_changed_models(training_setup, monkeypatch):
+    """Test that only models with changed hyperparameters are retrained"""
+    model_module.prepare_models(training_setup)
+    specs = dict(model_module.MODEL_SPECS)
+    specs[ModelPath.ADA_BOOST_REGRESSOR] = (
+        AdaBoostRegressor,
+        {"n_estimators": 6, "random_state": 42},
+    )
+    monkeypatch.setattr(model_module, "MODEL_SPECS", specs)
+    assert model_module.prepare_models(training_setup) == [
+        ModelPath.ADA_BOOST_REGRESSOR
+    ]
+
+
+def test_prepare_models_retrains_on_new_data(training_setup):
+    """Test that a changed training CSV retrains every model"""
+    model_module.prepare_models(training_setup)
+    with open(model_module.TRAINING_DATA, encoding="utf-8") as data_file:
+        lines = data_file.readlines()
+    with open(model_module.TRAINING_DATA, "w", encoding="utf-8") as data_file:
+        data_file.writelines(lines[:-1])
+    assert len(model_module.prepare_models(training_setup)) == 3
+
+
+def test_prepare_models_converts_missing_flat_artifacts(training_setup):
+    """Test that up-to-date forests without a flat copy are converted"""
+    model_module.prepare_models(training_setup)
+    filename = os.path.join(training_setup, ModelPath.FOREST_REGRSSION.value)
+    shutil.rmtree(flat_artifact_path(filename))
+    assert not model_module.prepare_models(training_setup)
+    assert os.path.isdir(flat_artifact_path(filename))
+
+
+def test_prepare_models_trains_in_parallel(training_setup, monkeypatch, caplog):
+    """Test the process pool path, atomic writes and the training report"""
+    monkeypatch.setattr(model_module, "TRAINING_WORKERS", 2)
+    with caplog.at_level("INFO"):
+        assert len(model_module.prepare_models(training_setup)) == 3
+    assert "with 2 worker(s)" in caplog.text
+    assert "peak RSS" in caplog.text
+
+    forest = model_module.load_model(
+        os.path.join(training_setup, ModelPath.FOREST_REGRSSION.value)
+    )
+    assert isinstance(forest, RandomForestRegressor)
+    assert forest.n_jobs is None
+    # Only artifacts, fingerprints and the dataset remain, no temporary files
+    assert len(os.listdir(training_setup)) == 9
+
+
+def test_write_atomically_cleans_up_failed_writes(tmp_path, monkeypatch):
+    """Test that a failed write keeps the old file and leaves no temp file"""
+    target = tmp_path / "artifact.pkl"
+    model_module.write_atomically(str(target), b"old")
+
+    def fail_replace(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        model_module.write_atomically(str(target), b"new")
+    assert target.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["artifact.pkl"]
@@ -0,0 +1,163 @@
+import os
+import pickle
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import AdaBoostRegressor
+from app.clients.service.logic import (
+    clean_input_data,
+    create_matrix,
+    intervention_permutations,
+)
+from app.clients.service.model_path import ModelPath
+from app.clients.service.model_registry import ModelRegistry
+from app.clients.service.tree_engine import (
+    FlatForest,
+    convert_pickle,
+    flat_artifact_path,
+)
+
+
+def load_artifact(directory, model_path):
+    with open(os.path.join(directory, model_path.value), "rb") as model_file:
+        return pickle.load(model_file)
+
+
+@pytest.fixture(scope="module")
+def training_features(trained_models):
+    data = pd.read_csv(os.path.join(trained_models, "data_commontool.csv"))
+    return data.drop(columns="success_rate").to_numpy(dtype=float)
+
+
+@pytest.mark.parametrize(
+    "model_path", [ModelPath.FOREST_REGRSSION, ModelPath.EXTRA_TREES_REGRESSOR]
+)
+def test_flat_forest_matches_predict(trained_models, training_features, model_path):
+    """Test that the flattened engine reproduces sklearn predictions"""
+    model = load_artifact(trained_models, model_path)
+    engine = FlatForest.from_estimator(model)
+    assert engine.n_trees == len(model.estimators_)
+
+    np.testing.assert_allclose(
+        engine.predict(training_features), model.predict(training_features)
+    )
+    rows = create_matrix(list(training_features[0, :24]))
+    np.testing.assert_allclose(engine.predict(rows), model.predict(rows))
+
+
+def test_flat_forest_matches_predict_on_random_inputs(
+    trained_models, training_features
+):
+    """Test parity on inputs outside the training data, including split edges"""
+    model = load_artifact(trained_models, ModelPath.FOREST_REGRSSION)
+    engine = FlatForest.from_estimator(model)
+    rng = np.random.default_rng(0)
+    low, high = training_features.min(axis=0), training_features.max(axis=0)
+    features = rng.integers(low, high + 1, size=(500, training_features.shape[1]))
+    np.testing.assert_allclose(engine.predict(features), model.predict(features))
+
+
+@pytest.mark.parametrize(
+    "model_path", [ModelPath.FOREST_REGRSSION, ModelPath.EXTRA_TREES_REGRESSOR]
+)
+def test_predict_combinations_matches_predict(
+    trained_models, training_features, model_path
+):
+    """Test that partial evaluation reproduces predict on all 128 combinations"""
+    model = load_artifact(trained_models, model_path)
+    engine = FlatForest.from_estimator(model)
+    combinations = intervention_permutations(7)
+    for row in training_features[:25, :24]:
+        np.testing.assert_allclose(
+            engine.predict_combinations(row, combinations),
+            model.predict(create_matrix(list(row))),
+        )
+
+
+def test_predict_combinations_stacks_clients(trained_models, training_features):
+    """Test that several clients walked together match walking each alone"""
+    model = load_artifact(trained_models, ModelPath.FOREST_REGRSSION)
+    engine = FlatForest.from_estimator(model)
+    combinations = intervention_permutations(7)
+    rows = training_features[:10, :24]
+    np.testing.assert_array_equal(
+        engine.predict_combinations(rows, combinations),
+        [engine.predict_combinations(row, combinations) for row in rows],
+    )
+
+
+def test_flat_forest_rejects_boosting(trained_models):
+    """Test that models that are not plain averages cannot be flattened"""
+    model = load_artifact(trained_models, ModelPath.ADA_BOOST_REGRESSOR)
+    assert isinstance(model, AdaBoostRegressor)
+    assert not FlatForest.supports(model)
+    with pytest.raises(TypeError):
+        FlatForest.from_estimator(model)
+
+
+def test_registry_serves_flat_engine(trained_models, model_registry, prediction_input):
+    """Test that opted-in models are served by the flattened engine"""
+    _, model = model_registry.active()
+    assert isinstance(model, FlatForest)
+
+    sklearn_model = load_artifact(trained_models, ModelPath.FOREST_REGRSSION)
+    rows = create_matrix(clean_input_data(prediction_input))
+    np.testing.assert_allclose(model.predict(rows), sklearn_model.predict(rows))
+
+
+def test_flat_forest_round_trips_memory_mapped(
+    trained_models, training_features, tmp_path
+):
+    """Test that a saved forest loads as read-only memory maps with parity"""
+    model = load_artifact(trained_models, ModelPath.EXTRA_TREES_REGRESSOR)
+    FlatForest.from_estimator(model).save(tmp_path / "forest.flat")
+
+    engine = FlatForest.load(tmp_path / "forest.flat")
+    assert isinstance(engine.threshold, np.memmap)
+    assert not engine.threshold.flags.writeable
+    np.testing.assert_allclose(
+        engine.predict(training_features), model.predict(training_features)
+    )
+    combinations = intervention_permutations(7)
+    row = training_features[0, :24]
+    np.testing.assert_allclose(
+        engine.predict_combinations(row, combinations),
+        model.predict(create_matrix(list(row))),
+    )
+
+
+def test_registry_maps_converted_artifacts(trained_models, tmp_path):
+    """Test that the registry prefers an up-to-date flattened artifact"""
+    pickle_path = tmp_path / ModelPath.FOREST_REGRSSION.value
+    shutil.copy(
+        os.path.join(trained_models, ModelPath.FOREST_REGRSSION.value), pickle_path
+    )
+    model_registry = ModelRegistry(directory=tmp_path)
+    assert not isinstance(model_registry.get("forest regression").value, np.memmap)
+
+    assert convert_pickle(str(pickle_path)) == flat_artifact_path(str(pickle_path))
+    model_registry.clear()
+    model = model_registry.get("forest regression")
+    assert isinstance(model.value, np.memmap)
+    assert model_registry.stats()["mapped_models"] == ["FOREST_REGRSSION"]
+
+    # A pickle retrained after the conversion wins over the stale copy
+    os.utime(pickle_path, (os.path.getmtime(pickle_path) + 60,) * 2)
+    model_registry.clear()
+    assert not isinstance(model_registry.get("forest regression").value, np.memmap)
+
+
+def test_registry_falls_back_to_pickle_mid_swap(trained_models, tmp_path):
+    """Test that a flattened artifact vanishing during a load uses the pickle"""
+    pickle_path = tmp_path / ModelPath.FOREST_REGRSSION.value
+    shutil.copy(
+        os.path.join(trained_models, ModelPath.FOREST_REGRSSION.value), pickle_path
+    )
+    flat_path = convert_pickle(str(pickle_path))
+    # The metadata is still there but the arrays are already gone
+    os.remove(os.path.join(flat_path, "value.npy"))
+
+    model = ModelRegistry(directory=tmp_path).get("forest regression")
+    assert isinstance(model, FlatForest)
+    assert not isinstance(model.value, np.memmap)